@@ -1,25 +1,42 @@
 from fastapi import Request, HTTPException, status
-from passlib.context import CryptContext
+from fastapi.concurrency import run_in_threadpool
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
 import os
+import time
 
 from app.utils.db_operations import fetch_one, fetch_all, execute
+from app.utils.cache import TTLCache
+from app.utils.token_revocation import revocation_store
+from app.utils import password_hashing
 import app.models.userModels as userModels
 
 SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey_change_me")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-revoked_tokens = set()
+# Duración del token que entrega /login
+LOGIN_TOKEN_EXPIRE_MINUTES = 60 * 24
+# Ningún token emitido vive más que esto; tope del exp que se guarda al revocar
+MAX_TOKEN_LIFETIME_SECONDS = max(ACCESS_TOKEN_EXPIRE_MINUTES, LOGIN_TOKEN_EXPIRE_MINUTES) * 60
+
+# Caché del usuario autenticado: id -> columnas que usan las rutas. Evita una
+# consulta por petición; los cambios hechos en otro proceso se ven como mucho
+# USER_CACHE_TTL segundos después
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+USER_PROJECTION = [
+    userModels.USER_COL_ID, userModels.USER_COL_NAME, userModels.USER_COL_EMAIL,
+    userModels.USER_COL_ROL, userModels.USER_COL_DEPARTMENT_ID,
+]
+user_cache = TTLCache("users", USER_CACHE_TTL, USER_CACHE_MAX_ENTRIES)
+# Tokens ya verificados: token -> (user_id, exp), para no repetir jwt.decode
+token_cache = TTLCache("tokens", USER_CACHE_TTL, USER_CACHE_MAX_ENTRIES)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hashing.verify_password(plain_password, hashed_password)[0]
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hashing.hash_password(password)
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     to_encode = data.copy()
@@ -32,10 +49,27 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     return encoded_jwt
 
 def revoke_token(token: str):
-    revoked_tokens.add(token)
+    """
+    Revoca un token con firma y exp válidos; los demás se ignoran (no sirven
+    para autenticarse, así que no hace falta guardarlos).
+    """
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return
+    max_expiry = int(time.time()) + MAX_TOKEN_LIFETIME_SECONDS
+    revocation_store.revoke(token, min(int(payload.get("exp") or max_expiry), max_expiry))
+    token_cache.delete(token)
 
 def is_token_revoked(token: str) -> bool:
-    return token in revoked_tokens
+    return revocation_store.is_revoked(token)
+
+def invalidate_user(user_id: int):
+    """
+    Quita al usuario de la caché de get_current_user. Llamar al cambiar su
+    contraseña, rol o departamento, al bloquearlo/desbloquearlo y al eliminarlo.
+    """
+    user_cache.delete(int(user_id))
 
 def get_user_by_email(email: str):
     sql = f"SELECT * FROM `{userModels.TABLE_USERS}` WHERE `{userModels.USER_COL_EMAIL}` = %s LIMIT 1"
@@ -76,22 +110,35 @@ def register_user(name: str, email: str, password: str, rol: str = 'user', depar
     user = fetch_one(f"SELECT * FROM `{userModels.TABLE_USERS}` WHERE `{userModels.USER_COL_ID}` = %s LIMIT 1", (user_id,))
     return user
 
-def authenticate_user(email: str, password: str):
-    user = get_user_by_email(email)
+async def authenticate_user(email: str, password: str):
+    """
+    Retorna el usuario si las credenciales son válidas, o False.
+
+    Las consultas van al threadpool y bcrypt al pool de procesos, sin ocupar
+    un hilo mientras espera: una ráfaga de logins no deja sin hilos al resto
+    de las rutas.
+    """
+    user = await run_in_threadpool(get_user_by_email, email)
     if not user:
         return False
-    if not verify_password(password, user.get(userModels.USER_COL_PASSWORD)):
+    hashed = user.get(userModels.USER_COL_PASSWORD)
+    valid, new_hash = await password_hashing.verify_password_async(password, hashed)
+    if not valid:
         return False
+    if new_hash:
+        # El costo de bcrypt cambió: se guarda el hash nuevo, salvo que la contraseña haya cambiado entretanto
+        await run_in_threadpool(
+            execute,
+            f"UPDATE `{userModels.TABLE_USERS}` SET `{userModels.USER_COL_PASSWORD}` = %s "
+            f"WHERE `{userModels.USER_COL_ID}` = %s AND `{userModels.USER_COL_PASSWORD}` = %s",
+            (new_hash, user[userModels.USER_COL_ID], hashed),
+        )
     return user
 
-def get_current_user(request: Request):
-    authorization = request.headers.get("Authorization")
-    token = authorization.replace("Bearer ", "") if authorization and authorization.startswith("Bearer ") else None
-    if not token:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
-
-    if is_token_revoked(token):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked")
+def _verified_user_id(token: str) -> int:
+    cached = token_cache.get(token)
+    if cached is not None and cached[1] > time.time():
+        return cached[0]
 
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -101,10 +148,29 @@ def get_current_user(request: Request):
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
 
-    user = fetch_one(f"SELECT * FROM `{userModels.TABLE_USERS}` WHERE `{userModels.USER_COL_ID}` = %s LIMIT 1", (int(user_id),))
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
+    token_cache.set(token, (int(user_id), payload.get("exp", 0)))
+    return int(user_id)
+
+def get_current_user(request: Request):
+    authorization = request.headers.get("Authorization")
+    token = authorization.replace("Bearer ", "") if authorization and authorization.startswith("Bearer ") else None
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+    if is_token_revoked(token):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked")
+
+    user_id = _verified_user_id(token)
+
+    user = user_cache.get(user_id)
+    if user is None:
+        columns = ", ".join(f"`{c}`" for c in USER_PROJECTION)
+        user = fetch_one(f"SELECT {columns} FROM `{userModels.TABLE_USERS}` WHERE `{userModels.USER_COL_ID}` = %s LIMIT 1", (user_id,))
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        user_cache.set(user_id, user)
+    # Copia: las rutas no deben poder modificar la entrada cacheada
+    return dict(user)
 
 def get_current_admin_user(request: Request):
     current_user = get_current_user(request)
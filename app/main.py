@@ -1,13 +1,21 @@
-from fastapi import FastAPI , Query
+from fastapi import FastAPI , Query, Request
+from fastapi.responses import JSONResponse
 from fastapi.openapi.utils import get_openapi
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes.userRouters import auth_router
 from fastapi.staticfiles import StaticFiles
-from app.utils.db_operations import execute
-from app.utils.db_connection import close_pool
-import app.models.userModels as models_module
+from app.utils.db_connection import (
+    close_pool, PoolExhaustedError, begin_request, end_request,
+    READ_YOUR_WRITES_COOKIE, READ_YOUR_WRITES_SECONDS,
+)
+import math
+from app.migrations import run_migrations, pending_migrations
+from app.utils.token_revocation import revocation_store
+from app.utils.password_hashing import HashingOverloadedError, shutdown_executor
+import os
 from app.routes.document_route import router as document_router
 from app.routes.auth import router as auth_router_email
+from app.routes.health_route import router as health_router
 from app.controllers.auth_controller import unlock_account_handler
 app = FastAPI()
 
@@ -27,19 +35,67 @@ app.add_middleware(
 
 @app.on_event("startup")
 def startup():
-    print("🚀 Startup: asegurando tablas (dev)...")
+    # Las migraciones se aplican una vez por despliegue (`python -m app.migrate`,
+    # fase release del Procfile); aquí solo se avisa si faltan
+    try:
+        if os.getenv("DB_MIGRATE_ON_STARTUP", "0") == "1":
+            applied = run_migrations()
+            print(f"🚀 Startup: migraciones aplicadas: {applied or 'ninguna pendiente'}")
+        else:
+            pending = pending_migrations()
+            if pending:
+                print(f"⚠️ Hay {len(pending)} migraciones pendientes. Ejecuta: python -m app.migrate")
+    except Exception as e:
+        print("❌ No se pudo verificar el esquema. Revisa la conexión a la BD:", e)
     try:
-        for sql in models_module.get_create_table_statements():
-            try:
-                execute(sql)
-            except Exception as e:
-                print("⚠️ Aviso creando tabla:", e)
-        print("✅ Intento de creación de tablas completado.")
+        loaded = revocation_store.sync()
+        print(f"🔒 Startup: {loaded} tokens revocados vigentes cargados")
     except Exception as e:
-        print("❌ No se pudieron ejecutar los DDLs de creación de tablas. Revisa la conexión a la BD:", e)
+        print("⚠️ No se pudieron cargar los tokens revocados:", e)
 app.include_router(auth_router, prefix="/api")
 app.include_router(document_router, prefix="/api/documents")
 app.include_router(auth_router_email, prefix="/api")
+app.include_router(health_router, prefix="/api")
+
+@app.middleware("http")
+async def db_session_middleware(request: Request, call_next):
+    # Tras una escritura el cliente recibe una cookie corta con su momento; en
+    # las peticiones siguientes (las atienda el proceso que sea) sus lecturas
+    # van al primario y ven sus propios cambios aunque la réplica tenga retraso
+    try:
+        last_write = float(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0))
+    except ValueError:
+        last_write = 0.0
+    token = begin_request(last_write)
+    wrote_at = None
+    try:
+        response = await call_next(request)
+    finally:
+        wrote_at = end_request(token)
+    if wrote_at is not None:
+        response.set_cookie(
+            READ_YOUR_WRITES_COOKIE, f"{wrote_at:.3f}",
+            max_age=math.ceil(READ_YOUR_WRITES_SECONDS), httponly=True, samesite="lax",
+        )
+    return response
+
+@app.exception_handler(PoolExhaustedError)
+async def pool_exhausted_handler(request: Request, exc: PoolExhaustedError):
+    # Sin conexiones libres: el cliente puede reintentar en breve
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Servidor ocupado, intenta de nuevo en unos segundos"},
+        headers={"Retry-After": "1"},
+    )
+
+@app.exception_handler(HashingOverloadedError)
+async def hashing_overloaded_handler(request: Request, exc: HashingOverloadedError):
+    # Cola de bcrypt llena (p. ej. ráfaga de logins): se rechaza sin esperar
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Servidor ocupado, intenta de nuevo en unos segundos"},
+        headers={"Retry-After": "1"},
+    )
 
 app.mount("/styles", StaticFiles(directory="app/styles"), name="styles")
 
@@ -50,6 +106,7 @@ def unlock_account(token: str = Query(...)):
 
 @app.on_event("shutdown")
 def shutdown():
+    shutdown_executor()
     try:
         close_pool()
         print("🧹 Pool de conexiones cerrado correctamente.")
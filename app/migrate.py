@@ -0,0 +1,32 @@
+"""
+Aplica las migraciones pendientes del esquema.
+
+Ejecutar con:  python -m app.migrate          (aplica las pendientes)
+               python -m app.migrate --check  (además verifica con EXPLAIN los índices)
+"""
+import sys
+
+from app.migrations import run_migrations, explain_check
+from app.utils.db_connection import close_pool
+
+def main() -> int:
+    try:
+        applied = run_migrations()
+        if applied:
+            print(f"✅ Migraciones aplicadas: {', '.join(str(v) for v in applied)}")
+        else:
+            print("✅ El esquema ya está al día.")
+
+        if "--check" in sys.argv:
+            failed = 0
+            for result in explain_check():
+                mark = "✅" if result["ok"] else "❌"
+                print(f"{mark} {result['query']}: type={result['type']} key={result['key']} rows={result['rows']}")
+                failed += not result["ok"]
+            return 1 if failed else 0
+        return 0
+    finally:
+        close_pool()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+Migraciones versionadas del esquema.
+
+Cada migración es un módulo con VERSION, NAME y up(cursor); las aplicadas se
+registran en schema_migrations. Para agregar una, crear el módulo siguiente
+y sumarlo a MIGRATIONS.
+"""
+from app.utils.db_connection import get_conn
+from .schema import table_exists
+from . import (
+    m001_baseline, m002_query_indexes, m003_search_index, m004_pagination_indexes, m005_table_blob,
+    m006_table_chunks, m007_numeric_values, m008_cache_versions, m009_revoked_tokens,
+    m010_reset_token_selector, m011_extraction_cache_counters,
+)
+
+MIGRATIONS = [
+    m001_baseline, m002_query_indexes, m003_search_index, m004_pagination_indexes, m005_table_blob,
+    m006_table_chunks, m007_numeric_values, m008_cache_versions, m009_revoked_tokens,
+    m010_reset_token_selector, m011_extraction_cache_counters,
+]
+
+MIGRATIONS_TABLE = "schema_migrations"
+# Evita que dos procesos (p. ej. varios workers arrancando) migren a la vez
+LOCK_NAME = "docsflow_schema_migrations"
+LOCK_TIMEOUT = 60
+
+def _ensure_migrations_table(cursor):
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+          version INT NOT NULL PRIMARY KEY,
+          name VARCHAR(100) NOT NULL,
+          applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+def _applied_versions(cursor) -> set:
+    cursor.execute(f"SELECT version FROM {MIGRATIONS_TABLE}")
+    return {row[0] for row in cursor.fetchall()}
+
+def pending_migrations() -> list:
+    """Retorna las migraciones aún no aplicadas, sin aplicarlas."""
+    with get_conn(readonly=True) as conn:
+        cursor = conn.cursor()
+        try:
+            applied = _applied_versions(cursor) if table_exists(cursor, MIGRATIONS_TABLE) else set()
+        finally:
+            cursor.close()
+    return [m for m in MIGRATIONS if m.VERSION not in applied]
+
+def run_migrations() -> list:
+    """Aplica en orden las migraciones pendientes. Retorna las versiones aplicadas."""
+    done = []
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, LOCK_TIMEOUT))
+            if cursor.fetchone()[0] != 1:
+                raise RuntimeError("Otro proceso está aplicando migraciones")
+            try:
+                _ensure_migrations_table(cursor)
+                applied = _applied_versions(cursor)
+                for migration in MIGRATIONS:
+                    if migration.VERSION in applied:
+                        continue
+                    print(f"🛠️ Aplicando migración {migration.VERSION:03d}_{migration.NAME}...")
+                    migration.up(cursor)
+                    cursor.execute(
+                        f"INSERT INTO {MIGRATIONS_TABLE} (version, name) VALUES (%s, %s)",
+                        (migration.VERSION, migration.NAME),
+                    )
+                    conn.commit()
+                    done.append(migration.VERSION)
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+                cursor.fetchone()
+        finally:
+            cursor.close()
+    return done
+
+# Consultas de las rutas que deben resolverse con índices y no con full scan
+EXPLAIN_QUERIES = [
+    ("list_documents (departamento)", """
+        SELECT id, filename, department, upload_date
+        FROM documents
+        WHERE department = %s
+        ORDER BY upload_date DESC, id DESC
+        LIMIT 51
+    """, (1,)),
+    ("list_documents (página siguiente)", """
+        SELECT id, filename, department, upload_date
+        FROM documents
+        WHERE upload_date < %s OR (upload_date = %s AND id < %s)
+        ORDER BY upload_date DESC, id DESC
+        LIMIT 51
+    """, ("2025-08-18", "2025-08-18", 1)),
+    ("users_list", """
+        SELECT id, name, email, rol FROM users
+        WHERE name > %s OR (name = %s AND id > %s)
+        ORDER BY name, id
+        LIMIT 51
+    """, ("a", "a", 1)),
+    ("get_tables_by_document", """
+        SELECT id, page_number, description, table_format, table_blob, table_data
+        FROM extracted_tables
+        WHERE document_id = %s
+    """, (1,)),
+    ("get_document", """
+        SELECT id, filename, department, upload_date
+        FROM documents
+        WHERE id = %s AND department = %s
+    """, (1, 1)),
+    ("search_tables (departamento)", """
+        SELECT table_id, SUM(weight) AS score
+        FROM search_terms
+        WHERE term LIKE %s AND department = %s
+        GROUP BY table_id
+    """, ("costo%", 1)),
+    ("filter_tables (departamento)", """
+        SELECT table_id, COUNT(*) AS matched_rows
+        FROM table_numeric_values
+        WHERE department = %s AND column_key = %s AND value > %s
+        GROUP BY table_id
+    """, (1, "total", 250000)),
+]
+INDEX_ACCESS_TYPES = {"const", "eq_ref", "ref", "range", "ref_or_null", "index_merge"}
+
+def explain_check() -> list:
+    """
+    Ejecuta EXPLAIN sobre las consultas de EXPLAIN_QUERIES.
+
+    Retorna por consulta: nombre, tipo de acceso, índice usado y si pasa
+    (acceso por índice, no full scan).
+    """
+    results = []
+    with get_conn(readonly=True) as conn:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            for name, sql, params in EXPLAIN_QUERIES:
+                cursor.execute("EXPLAIN " + sql, params)
+                plan = cursor.fetchall()[0]
+                results.append({
+                    "query": name,
+                    "type": plan["type"],
+                    "key": plan["key"],
+                    "rows": plan["rows"],
+                    "ok": plan["type"] in INDEX_ACCESS_TYPES and plan["key"] is not None,
+                })
+        finally:
+            cursor.close()
+    return results
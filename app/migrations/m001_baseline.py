@@ -0,0 +1,14 @@
+"""Esquema inicial: las tablas que antes se creaban en cada arranque."""
+import app.models.userModels as models_module
+from .schema import add_column_if_missing, add_index_if_missing
+
+VERSION = 1
+NAME = "baseline"
+
+def up(cursor):
+    for sql in models_module.get_create_table_statements():
+        cursor.execute(sql)
+
+    # Bases creadas antes del almacén de PDFs por hash
+    add_column_if_missing(cursor, "documents", "blob_key", "CHAR(64) NULL AFTER filename")
+    add_index_if_missing(cursor, "documents", "idx_documents_blob_key", "blob_key")
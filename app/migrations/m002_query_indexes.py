@@ -0,0 +1,15 @@
+"""Índices para las consultas de las rutas de documentos."""
+from .schema import add_index_if_missing, drop_index_if_exists
+
+VERSION = 2
+NAME = "query_indexes"
+
+def up(cursor):
+    # list_documents: filtro por departamento ordenado por fecha (usuarios) y
+    # orden por fecha de todos los documentos (admin)
+    add_index_if_missing(cursor, "documents", "idx_documents_department_upload", "department, upload_date, id")
+    add_index_if_missing(cursor, "documents", "idx_documents_upload", "upload_date, id")
+
+    # get_tables_by_document: hasta ahora solo existía el índice implícito de la FK
+    add_index_if_missing(cursor, "extracted_tables", "idx_extracted_tables_document", "document_id, page_number")
+    drop_index_if_exists(cursor, "extracted_tables", "document_id")
@@ -0,0 +1,41 @@
+"""Índice invertido para la búsqueda de tablas, poblado con las tablas ya extraídas."""
+import json
+
+from app.utils.search_index import index_tables
+
+VERSION = 3
+NAME = "search_index"
+BACKFILL_BATCH_SIZE = 500
+
+def up(cursor):
+    # department 0 = documentos sin departamento (la PK no admite NULL)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS search_terms (
+          term VARCHAR(64) NOT NULL,
+          department INT NOT NULL,
+          table_id INT NOT NULL,
+          document_id INT NOT NULL,
+          weight SMALLINT UNSIGNED NOT NULL,
+          PRIMARY KEY (term, department, table_id),
+          INDEX idx_search_terms_document (document_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_bin
+    """)
+
+    cursor.execute("DELETE FROM search_terms")
+    last_id = 0
+    while True:
+        cursor.execute("""
+            SELECT t.id, t.document_id, d.department, t.description, t.table_data
+            FROM extracted_tables t
+            JOIN documents d ON t.document_id = d.id
+            WHERE t.id > %s
+            ORDER BY t.id
+            LIMIT %s
+        """, (last_id, BACKFILL_BATCH_SIZE))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        for table_id, document_id, department, description, table_data in rows:
+            table = {"description": description, "data": json.loads(table_data) if table_data else []}
+            index_tables(cursor, document_id, department, [table_id], [table])
+        last_id = rows[-1][0]
@@ -0,0 +1,9 @@
+"""Índice para paginar el listado de usuarios por nombre."""
+from .schema import add_index_if_missing
+
+VERSION = 4
+NAME = "pagination_indexes"
+
+def up(cursor):
+    # users_list: ORDER BY name, id con cursor (name, id)
+    add_index_if_missing(cursor, "users", "idx_users_name", "name, id")
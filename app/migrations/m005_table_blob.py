@@ -0,0 +1,39 @@
+"""
+table_data comprimido: columnas table_format y table_blob (LONGBLOB).
+
+Las filas existentes se convierten por lotes del formato legado (JSON en TEXT)
+al formato actual; table_data queda en NULL.
+"""
+import json
+
+from app.utils.table_codec import encode_table, FORMAT_JSON_TEXT
+from .schema import add_column_if_missing
+
+VERSION = 5
+NAME = "table_blob"
+CONVERT_BATCH_SIZE = 500
+
+def up(cursor):
+    add_column_if_missing(cursor, "extracted_tables", "table_format", "TINYINT NOT NULL DEFAULT 0 AFTER description")
+    add_column_if_missing(cursor, "extracted_tables", "table_blob", "LONGBLOB NULL AFTER table_format")
+    # Los datos nuevos van en table_blob; TEXT (64 KB) cortaba las tablas grandes
+    cursor.execute("ALTER TABLE extracted_tables MODIFY table_data LONGTEXT NULL")
+
+    last_id = 0
+    while True:
+        cursor.execute("""
+            SELECT id, table_data FROM extracted_tables
+            WHERE id > %s AND table_format = %s
+            ORDER BY id
+            LIMIT %s
+        """, (last_id, FORMAT_JSON_TEXT, CONVERT_BATCH_SIZE))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        for table_id, table_data in rows:
+            table_format, table_blob = encode_table(json.loads(table_data) if table_data else [])
+            cursor.execute("""
+                UPDATE extracted_tables SET table_format = %s, table_blob = %s, table_data = NULL
+                WHERE id = %s
+            """, (table_format, table_blob, table_id))
+        last_id = rows[-1][0]
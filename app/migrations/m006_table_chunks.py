@@ -0,0 +1,53 @@
+"""
+Tablas grandes en bloques de filas (formato 2): extracted_table_chunks y las
+columnas row_count / chunk_rows.
+
+Las tablas existentes con más de TABLE_CHUNK_ROWS filas se pasan a bloques; al
+resto solo se le completa row_count.
+"""
+from app.utils.db_operations import insert_table_chunks
+from app.utils.table_codec import decode_table, FORMAT_CHUNKED, TABLE_CHUNK_ROWS
+from .schema import add_column_if_missing
+
+VERSION = 6
+NAME = "table_chunks"
+CONVERT_BATCH_SIZE = 200
+
+def up(cursor):
+    add_column_if_missing(cursor, "extracted_tables", "row_count", "INT NULL AFTER table_blob")
+    add_column_if_missing(cursor, "extracted_tables", "chunk_rows", "INT NULL AFTER row_count")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS extracted_table_chunks (
+          table_id INT NOT NULL,
+          chunk_index INT NOT NULL,
+          row_count INT NOT NULL,
+          chunk_blob LONGBLOB NOT NULL, -- filas en JSON comprimido con zlib
+          PRIMARY KEY (table_id, chunk_index),
+          CONSTRAINT fk_extracted_table_chunks_table FOREIGN KEY (table_id)
+            REFERENCES extracted_tables (id) ON DELETE CASCADE
+        )
+    """)
+
+    last_id = 0
+    while True:
+        cursor.execute("""
+            SELECT id, table_format, table_blob, table_data FROM extracted_tables
+            WHERE id > %s AND row_count IS NULL AND table_format <> %s
+            ORDER BY id
+            LIMIT %s
+        """, (last_id, FORMAT_CHUNKED, CONVERT_BATCH_SIZE))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        for table_id, table_format, table_blob, table_data in rows:
+            data = decode_table(table_format, table_blob, table_data)
+            if len(data) > TABLE_CHUNK_ROWS:
+                insert_table_chunks(cursor, table_id, data, TABLE_CHUNK_ROWS)
+                cursor.execute("""
+                    UPDATE extracted_tables
+                    SET table_format = %s, table_blob = NULL, table_data = NULL, row_count = %s, chunk_rows = %s
+                    WHERE id = %s
+                """, (FORMAT_CHUNKED, len(data), TABLE_CHUNK_ROWS, table_id))
+            else:
+                cursor.execute("UPDATE extracted_tables SET row_count = %s WHERE id = %s", (len(data), table_id))
+        last_id = rows[-1][0]
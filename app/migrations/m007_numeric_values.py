@@ -0,0 +1,58 @@
+"""Columnas numéricas tipadas (table_numeric_values), pobladas con las tablas ya extraídas."""
+from app.utils.table_codec import decode_table, decode_chunk, FORMAT_CHUNKED
+from app.utils.table_typing import index_numeric_columns
+
+VERSION = 7
+NAME = "numeric_values"
+BACKFILL_BATCH_SIZE = 200
+
+def _load_rows(cursor, table_id, table_format, table_blob, table_data):
+    if table_format != FORMAT_CHUNKED:
+        return decode_table(table_format, table_blob, table_data)
+    cursor.execute("""
+        SELECT chunk_blob FROM extracted_table_chunks
+        WHERE table_id = %s ORDER BY chunk_index
+    """, (table_id,))
+    rows = []
+    for (chunk_blob,) in cursor.fetchall():
+        rows.extend(decode_chunk(chunk_blob))
+    return rows
+
+def up(cursor):
+    # department 0 = documentos sin departamento, como en search_terms
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS table_numeric_values (
+          table_id INT NOT NULL,
+          column_index SMALLINT NOT NULL,
+          row_index INT NOT NULL,
+          document_id INT NOT NULL,
+          department INT NOT NULL,
+          column_key VARCHAR(100) NOT NULL,
+          kind ENUM('number','currency','percent') NOT NULL,
+          value DOUBLE NOT NULL,
+          PRIMARY KEY (table_id, column_index, row_index),
+          INDEX idx_numeric_values_department (department, column_key, value),
+          INDEX idx_numeric_values_column (column_key, value),
+          CONSTRAINT fk_numeric_values_table FOREIGN KEY (table_id)
+            REFERENCES extracted_tables (id) ON DELETE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_bin
+    """)
+
+    cursor.execute("DELETE FROM table_numeric_values")
+    last_id = 0
+    while True:
+        cursor.execute("""
+            SELECT t.id, t.document_id, d.department, t.table_format, t.table_blob, t.table_data
+            FROM extracted_tables t
+            JOIN documents d ON t.document_id = d.id
+            WHERE t.id > %s
+            ORDER BY t.id
+            LIMIT %s
+        """, (last_id, BACKFILL_BATCH_SIZE))
+        batch = cursor.fetchall()
+        if not batch:
+            break
+        for table_id, document_id, department, table_format, table_blob, table_data in batch:
+            data = _load_rows(cursor, table_id, table_format, table_blob, table_data)
+            index_numeric_columns(cursor, document_id, department, [table_id], [{"data": data}])
+        last_id = batch[-1][0]
@@ -0,0 +1,13 @@
+"""Contadores de versión por departamento para invalidar cachés entre procesos."""
+
+VERSION = 8
+NAME = "cache_versions"
+
+def up(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cache_versions (
+          scope VARCHAR(64) NOT NULL PRIMARY KEY,
+          version BIGINT NOT NULL DEFAULT 0,
+          updated_at DATETIME NOT NULL
+        )
+    """)
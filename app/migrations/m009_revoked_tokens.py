@@ -0,0 +1,17 @@
+"""Tokens revocados compartidos entre procesos, con su expiración."""
+
+VERSION = 9
+NAME = "revoked_tokens"
+
+def up(cursor):
+    # expires_at es el `exp` del JWT (segundos epoch UTC)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS revoked_tokens (
+          id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+          token_hash CHAR(64) NOT NULL,
+          expires_at BIGINT NOT NULL,
+          revoked_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+          UNIQUE KEY uq_revoked_tokens_hash (token_hash),
+          KEY idx_revoked_tokens_expires (expires_at)
+        )
+    """)
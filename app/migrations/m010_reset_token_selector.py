@@ -0,0 +1,13 @@
+"""Selector indexado para los tokens de restablecimiento de contraseña."""
+from .schema import add_column_if_missing, add_index_if_missing
+
+VERSION = 10
+NAME = "reset_token_selector"
+
+def up(cursor):
+    # Las filas existentes quedan con selector NULL (tokens uuid4 con bcrypt)
+    # y se aceptan hasta que vencen
+    add_column_if_missing(cursor, "password_resets", "selector", "VARCHAR(32) NULL AFTER user_id")
+    add_index_if_missing(cursor, "password_resets", "uq_password_resets_selector", "selector", kind="UNIQUE INDEX")
+    add_index_if_missing(cursor, "password_resets", "idx_password_resets_expires", "expires_at")
+    cursor.execute("DELETE FROM password_resets WHERE expires_at <= NOW()")
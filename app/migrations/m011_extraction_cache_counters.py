@@ -0,0 +1,12 @@
+"""Contadores de la caché de extracción compartidos entre procesos (API y worker)."""
+
+VERSION = 11
+NAME = "extraction_cache_counters"
+
+def up(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS extraction_cache_counters (
+          name VARCHAR(32) NOT NULL PRIMARY KEY,
+          value BIGINT NOT NULL DEFAULT 0
+        )
+    """)
@@ -0,0 +1,35 @@
+"""Utilidades para que las migraciones sean idempotentes sobre bases ya existentes."""
+
+def table_exists(cursor, table: str) -> bool:
+    cursor.execute("""
+        SELECT 1 FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_name = %s
+    """, (table,))
+    return cursor.fetchone() is not None
+
+def column_exists(cursor, table: str, column: str) -> bool:
+    cursor.execute("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+    """, (table, column))
+    return cursor.fetchone() is not None
+
+def index_exists(cursor, table: str, index: str) -> bool:
+    cursor.execute("""
+        SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        LIMIT 1
+    """, (table, index))
+    return cursor.fetchone() is not None
+
+def add_column_if_missing(cursor, table: str, column: str, definition: str):
+    if not column_exists(cursor, table, column):
+        cursor.execute(f"ALTER TABLE `{table}` ADD COLUMN `{column}` {definition}")
+
+def add_index_if_missing(cursor, table: str, index: str, columns: str, kind: str = "INDEX"):
+    if not index_exists(cursor, table, index):
+        cursor.execute(f"ALTER TABLE `{table}` ADD {kind} `{index}` ({columns})")
+
+def drop_index_if_exists(cursor, table: str, index: str):
+    if index_exists(cursor, table, index):
+        cursor.execute(f"ALTER TABLE `{table}` DROP INDEX `{index}`")
@@ -55,9 +55,11 @@ def get_create_table_statements() -> list:
 CREATE TABLE IF NOT EXISTS documents (
     id INT AUTO_INCREMENT PRIMARY KEY,
     filename VARCHAR(255),
+    blob_key CHAR(64) NULL,
     uploaded_by INT,
     department INT,
-    upload_date DATETIME
+    upload_date DATETIME,
+    INDEX idx_documents_blob_key (blob_key)
 );
 
 """)
@@ -73,6 +75,41 @@ CREATE TABLE IF NOT EXISTS documents (
     );
 """)
     
+    stmts.append(f"""
+    CREATE TABLE IF NOT EXISTS extraction_jobs (
+      id INT AUTO_INCREMENT PRIMARY KEY,
+      document_id INT NOT NULL,
+      file_path VARCHAR(512) NOT NULL,
+      status ENUM('queued','running','done','failed') NOT NULL DEFAULT 'queued',
+      tables_found INT NOT NULL DEFAULT 0,
+      attempts INT NOT NULL DEFAULT 0,
+      worker_id VARCHAR(100) NULL,
+      error TEXT NULL,
+      created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+      started_at DATETIME NULL,
+      heartbeat_at DATETIME NULL,
+      finished_at DATETIME NULL,
+      INDEX idx_extraction_jobs_status (status, id),
+      INDEX idx_extraction_jobs_document (document_id),
+      FOREIGN KEY (document_id) REFERENCES documents(id) ON DELETE CASCADE
+    );
+""")
+
+    stmts.append(f"""
+    CREATE TABLE IF NOT EXISTS extraction_cache (
+      content_hash CHAR(64) NOT NULL,
+      extractor_version VARCHAR(32) NOT NULL,
+      payload LONGBLOB NOT NULL, -- JSON comprimido con zlib
+      size_bytes INT NOT NULL,
+      table_count INT NOT NULL,
+      hits INT NOT NULL DEFAULT 0,
+      created_at DATETIME NOT NULL,
+      last_used_at DATETIME NOT NULL,
+      PRIMARY KEY (content_hash, extractor_version),
+      INDEX idx_extraction_cache_last_used (last_used_at)
+    );
+""")
+
     stmts.append(f"""
     CREATE TABLE IF NOT EXISTS password_resets (
         id INT AUTO_INCREMENT PRIMARY KEY,
@@ -1,53 +1,245 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query, Security
-from app.utils.db_operations import get_db
-from app.utils.pdf_processor import extract_tables
-from app.utils.file_utils import save_pdf
-from app.controllers.userControllers import get_current_user
-import json
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query, Request, Response, Security
+from app.utils.db_operations import fetch_one, fetch_all, bulk_insert
+from app.utils.db_connection import get_conn
+from app.utils.job_queue import enqueue_jobs, get_job, JOB_QUEUED
+from app.utils.extraction_cache import cache_stats
+from app.utils.file_utils import save_pdf, save_stream, FileTooLargeError, UPLOAD_FOLDER
+from app.utils.search_index import remove_document, search, SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT
+from app.utils.table_stream import stream_tables
+from app.utils.table_rows import read_rows, project, column_indexes
+from app.utils.table_typing import column_key
+from app.utils.table_aggregate import aggregate_column
+from app.utils.cache import TTLCache
+from app.utils.http_cache import make_etag, etag_matches, cache_headers, not_modified
+from app.utils.cache_versions import bump_versions, get_versions, scopes_for_department, department_scope, SCOPE_ALL
+from app.utils.pagination import decode_cursor, split_page, PAGE_DEFAULT_LIMIT, PAGE_MAX_LIMIT
+from app.controllers.userControllers import get_current_user, user_cache, token_cache
+from app.utils.token_revocation import revocation_store
 import os
+import zipfile
+import zlib
+from contextlib import nullcontext
+
+ZIP_CONTENT_TYPES = {"application/zip", "application/x-zip-compressed"}
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "500"))
+BATCH_MAX_FILE_BYTES = int(os.getenv("BATCH_MAX_FILE_BYTES", str(200 * 1024 * 1024)))
+BATCH_MAX_TOTAL_BYTES = int(os.getenv("BATCH_MAX_TOTAL_BYTES", str(1024 * 1024 * 1024)))
+# Errores al leer una entrada de un ZIP: cifrada, compresión no soportada, CRC o archivo truncado
+ZIP_ENTRY_ERRORS = (zipfile.BadZipFile, RuntimeError, NotImplementedError, EOFError, zlib.error)
+TABLE_ROWS_DEFAULT_LIMIT = 100
+TABLE_ROWS_MAX_LIMIT = 5000
+# Caché de listados por departamento (o admin); se invalida al subir o eliminar.
+# La clave incluye la versión del departamento guardada en la BD (la misma del
+# ETag), así un cambio hecho en otro proceso invalida también esta caché
+LISTING_CACHE_TTL = float(os.getenv("LISTING_CACHE_TTL", "30"))
+LISTING_CACHE_MAX_ENTRIES = int(os.getenv("LISTING_CACHE_MAX_ENTRIES", "1024"))
+FILTER_OPERATORS = {"gt": ">", "gte": ">=", "lt": "<", "lte": "<=", "eq": "="}
 
 router = APIRouter(tags=['Documents'])
+listing_cache = TTLCache("listings", LISTING_CACHE_TTL, LISTING_CACHE_MAX_ENTRIES)
 
-@router.post("/upload", summary="Subir documento PDF")
+def _invalidate_listings(department: int | None):
+    scopes = set(scopes_for_department(department))
+    listing_cache.delete_where(lambda key: key[0] in scopes)
+
+def _register_uploads(uploads: list, user) -> list:
+    """
+    Crea en una sola transacción los documentos de archivos ya guardados
+    [(filename, blob_key, file_path), ...] y encola sus trabajos de extracción.
+
+    Si el contenido ya se extrajo antes, el worker copia las tablas desde la
+    caché sin volver a analizar el PDF; la petición solo inserta una fila por
+    documento y por trabajo. Retorna un resultado por archivo, en el mismo orden.
+    """
+    with get_conn() as db:
+        cursor = db.cursor()
+        try:
+            cursor.execute("SELECT NOW()")
+            now = cursor.fetchone()[0]
+            document_ids = bulk_insert(
+                cursor, "documents",
+                ["filename", "blob_key", "uploaded_by", "department", "upload_date"],
+                [(filename, blob_key, user["id"], user["department_id"], now) for filename, blob_key, _ in uploads],
+            )
+            job_ids = enqueue_jobs(cursor, [(document_id, file_path) for document_id, (_, _, file_path) in zip(document_ids, uploads)])
+            bump_versions(cursor, scopes_for_department(user["department_id"]))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            cursor.close()
+    _invalidate_listings(user["department_id"])
+
+    return [
+        {"filename": filename, "document_id": document_id, "job_id": job_id, "status": JOB_QUEUED}
+        for document_id, job_id, (filename, _, _) in zip(document_ids, job_ids, uploads)
+    ]
+
+@router.post("/upload", summary="Subir documento PDF", status_code=202)
 def upload_document(file: UploadFile = File(...), user=Security(get_current_user)):
     """
-    Sube un archivo PDF, lo guarda en el servidor y extrae las tablas contenidas.
+    Sube un archivo PDF, lo guarda en el servidor y encola la extracción de tablas.
 
     🔐 Requiere autenticación con JWT (Authorization: Bearer <token>)
 
     - Solo se permiten archivos PDF.
     - El documento se asocia al usuario y su departamento.
-    - Las tablas extraídas se almacenan en la base de datos.
+    - La extracción la realiza un worker (`python -m app.worker`); el progreso
+      se consulta en `/api/documents/jobs/{job_id}`.
+    - Si el mismo contenido ya fue procesado, el worker reutiliza sus tablas
+      sin volver a analizar el PDF.
     """
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="Solo se permiten archivos PDF")
 
-    filename, file_path = save_pdf(file)
-    tables = extract_tables(file_path)
+    try:
+        filename, blob_key, file_path = save_pdf(file, max_bytes=BATCH_MAX_FILE_BYTES)
+    except FileTooLargeError:
+        raise HTTPException(status_code=413, detail="Archivo demasiado grande")
+    result = _register_uploads([(filename, blob_key, file_path)], user)[0]
+    result.pop("filename")
+    return {"message": "Documento en cola de procesamiento", **result}
+
+def _is_zip(file: UploadFile) -> bool:
+    return file.content_type in ZIP_CONTENT_TYPES or (file.filename or "").lower().endswith(".zip")
+
+def _rejected(filename: str, error: str) -> dict:
+    return {"filename": filename, "status": "rejected", "error": error}
+
+def _zip_entries(file: UploadFile, rejected: list) -> list:
+    """Retorna las entradas PDF de un ZIP; las demás se agregan a `rejected`."""
+    try:
+        archive = zipfile.ZipFile(file.file)
+    except zipfile.BadZipFile:
+        rejected.append(_rejected(file.filename, "ZIP inválido"))
+        return []
+
+    entries = []
+    for info in archive.infolist():
+        name = os.path.basename(info.filename)
+        if info.is_dir() or not name or name.startswith(".") or info.filename.startswith("__MACOSX/"):
+            continue
+        if not name.lower().endswith(".pdf"):
+            rejected.append(_rejected(info.filename, "Solo se permiten archivos PDF"))
+        elif info.file_size > BATCH_MAX_FILE_BYTES:
+            rejected.append(_rejected(info.filename, "Archivo demasiado grande"))
+        else:
+            entries.append((info.filename, lambda info=info: archive.open(info)))
+    return entries
+
+@router.post("/upload/batch", summary="Subir varios PDFs o un ZIP", status_code=202)
+def upload_batch(files: list[UploadFile] = File(...), user=Security(get_current_user)):
+    """
+    Sube varios archivos PDF (o archivos ZIP con PDFs) en una sola petición.
+
+    🔐 Requiere autenticación con JWT (Authorization: Bearer <token>)
 
-    db = get_db()
-    cursor = db.cursor()
+    - Cada PDF se guarda por streaming y se encola para el worker.
+    - Los documentos y trabajos se crean en bloque en una sola transacción.
+    - Cada archivo puede pesar hasta BATCH_MAX_FILE_BYTES y el lote completo
+      hasta BATCH_MAX_TOTAL_BYTES; los que no entran, o las entradas de ZIP
+      que no se pueden leer (cifradas, dañadas), se reportan como rechazados
+      sin afectar al resto.
+    - Retorna el resultado por archivo y un resumen del lote.
+    """
+    rejected = []
+    entries = []
+    for file in files:
+        if _is_zip(file):
+            entries.extend(_zip_entries(file, rejected))
+        elif file.content_type == "application/pdf":
+            entries.append((file.filename, lambda file=file: nullcontext(file.file)))
+        else:
+            rejected.append(_rejected(file.filename, "Solo se permiten archivos PDF"))
+
+    if len(entries) > BATCH_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"Máximo {BATCH_MAX_FILES} archivos por lote")
+
+    uploads = []
+    remaining = BATCH_MAX_TOTAL_BYTES
+    for filename, open_stream in entries:
+        if remaining <= 0:
+            rejected.append(_rejected(filename, "Se superó el tamaño máximo del lote"))
+            continue
+        max_bytes = min(BATCH_MAX_FILE_BYTES, remaining)
+        try:
+            with open_stream() as stream:
+                blob_key, file_path = save_stream(stream, max_bytes=max_bytes)
+        except FileTooLargeError:
+            too_large = "Archivo demasiado grande" if max_bytes == BATCH_MAX_FILE_BYTES else "Se superó el tamaño máximo del lote"
+            rejected.append(_rejected(filename, too_large))
+            continue
+        except ZIP_ENTRY_ERRORS as e:
+            rejected.append(_rejected(filename, f"No se pudo leer el archivo: {e}"))
+            continue
+        remaining -= os.path.getsize(file_path)
+        uploads.append((os.path.basename(filename or "") or "documento.pdf", blob_key, file_path))
+
+    results = (_register_uploads(uploads, user) if uploads else []) + rejected
+    summary = {
+        "files": len(results),
+        "queued": sum(1 for r in results if r["status"] == JOB_QUEUED),
+        "rejected": len(rejected),
+    }
+    return {"message": "Lote recibido", "summary": summary, "results": results}
+
+@router.get("/jobs/{job_id}", summary="Estado de la extracción de un documento")
+def get_job_status(job_id: int, user=Security(get_current_user)):
+    """
+    Consulta el estado de un trabajo de extracción.
+
+    🔐 Requiere autenticación con JWT
+
+    - Estados: queued, running, done, failed.
+    - `tables_found` indica las tablas extraídas hasta el momento.
+    - Usuario: solo puede consultar trabajos de documentos de su departamento.
+    """
+    job = get_job(job_id)
+    if not job or (user["rol"] != "admin" and job["department"] != user["department_id"]):
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
 
-    cursor.execute("""
-        INSERT INTO documents (filename, uploaded_by, department, upload_date)
-        VALUES (%s, %s, %s, NOW())
-    """, (filename, user["id"], user["department_id"]))
-    document_id = cursor.lastrowid
+    job.pop("department")
+    return {"job": job}
 
-    for t in tables:
-        cursor.execute("""
-            INSERT INTO extracted_tables (document_id, page_number, description, table_data)
-            VALUES (%s, %s, %s, %s)
-        """, (document_id, t["page"], t["description"], json.dumps(t["data"])))
+@router.get("/cache/stats", summary="Estadísticas de las cachés (solo admin)")
+def extraction_cache_stats(user=Security(get_current_user)):
+    """
+    Retorna aciertos/fallos de la caché de extracción (acumulados en la BD por
+    el worker) y su tamaño actual, y los de las cachés de listados y de
+    usuarios de este proceso.
 
-    db.commit()
-    cursor.close()
-    db.close()
+    🔐 Requiere autenticación con JWT
 
-    return {"message": "Documento procesado", "document_id": document_id, "tables": len(tables)}
+    - Solo el administrador puede consultar esta información.
+    """
+    if user["rol"] != "admin":
+        raise HTTPException(status_code=403, detail="Acceso denegado: solo el administrador puede ver estas estadísticas")
+
+    return {
+        "cache": cache_stats(),
+        "listings": listing_cache.stats(),
+        "users": user_cache.stats(),
+        "tokens": token_cache.stats(),
+        "revoked_tokens": revocation_store.stats(),
+    }
+
+def _decode_cursor(cursor: str | None, size: int, datetimes: tuple = ()):
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor, size, datetimes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/", summary="Listar documentos disponibles")
-def list_documents(user=Security(get_current_user)):
+def list_documents(
+    request: Request,
+    response: Response,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    cursor: str | None = Query(None, description="`next_cursor` de la página anterior"),
+    user=Security(get_current_user),
+):
     """
     Lista los documentos disponibles según el rol del usuario.
 
@@ -55,35 +247,180 @@ def list_documents(user=Security(get_current_user)):
 
     - Admin: ve todos los documentos.
     - Usuario: ve solo los documentos de su departamento.
+    - Paginado del más reciente al más antiguo: `limit` documentos por página;
+      para la siguiente se envía el `next_cursor` recibido (null = última página).
+    - Las páginas se cachean por departamento hasta la próxima subida o
+      eliminación (o LISTING_CACHE_TTL segundos).
+    - Envía un ETag que cambia con cada subida o eliminación en el
+      departamento; con `If-None-Match` responde 304 si no hubo cambios.
     """
-    db = get_db()
-    cursor = db.cursor(dictionary=True)
+    after = _decode_cursor(cursor, 2, datetimes=(0,))
 
-    rol = user["rol"]
-    department_id = user["department_id"]
+    scope = SCOPE_ALL if user["rol"] == "admin" else department_scope(user["department_id"])
+    version = get_versions([scope])[scope]
+    etag = make_etag("documents", scope, version, limit, cursor or "")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(cache_headers(etag))
 
-    if rol == "admin":
-        cursor.execute("""
-            SELECT id, filename, department, upload_date
-            FROM documents
-            ORDER BY upload_date DESC
-        """)
-    else:
-        cursor.execute("""
-            SELECT id, filename, department, upload_date
-            FROM documents
-            WHERE department = %s
-            ORDER BY upload_date DESC
-        """, (department_id,))
+    cache_key = (scope, version, limit, cursor)
+    cached = listing_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
-    documents = cursor.fetchall()
-    cursor.close()
-    db.close()
+    where, params = [], []
+    if user["rol"] != "admin":
+        where.append("department = %s")
+        params.append(user["department_id"])
+    if after:
+        where.append("(upload_date < %s OR (upload_date = %s AND id < %s))")
+        params += [after[0], after[0], after[1]]
+    params.append(limit + 1)
+
+    documents = fetch_all(f"""
+        SELECT id, filename, department, upload_date
+        FROM documents
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY upload_date DESC, id DESC
+        LIMIT %s
+    """, tuple(params))
+
+    documents, next_cursor = split_page(documents, limit, lambda d: (d["upload_date"], d["id"]))
+    page = {"documents": documents, "next_cursor": next_cursor}
+    listing_cache.set(cache_key, page)
+    return page
+
+@router.get("/search", summary="Buscar tablas por descripción y contenido")
+def search_tables(
+    query: str,
+    limit: int = Query(SEARCH_DEFAULT_LIMIT, ge=1, le=SEARCH_MAX_LIMIT),
+    cursor: str | None = Query(None, description="`next_cursor` de la página anterior"),
+    department: int | None = Query(None, description="Solo admin: filtrar por departamento"),
+    user=Security(get_current_user),
+):
+    """
+    Busca tablas por su descripción y por el contenido de sus celdas.
+
+    🔐 Requiere autenticación con JWT
+
+    - La búsqueda es insensible a mayúsculas/minúsculas y tildes.
+    - Se normalizan números (ej. '400.000' ≈ '400000').
+    - Cada palabra de la consulta coincide como prefijo ('costo' encuentra 'costos').
+    - Los resultados se ordenan por relevancia (la descripción pesa más que
+      las celdas), `limit` por página; la siguiente se pide con `next_cursor`.
+    - Admin: busca en todos los documentos, o en `department` si se indica.
+    - Usuario: busca solo en documentos de su departamento.
+    """
+    if user["rol"] != "admin":
+        department = user["department_id"] or 0
+    after = _decode_cursor(cursor, 3)
+
+    with get_conn(readonly=True) as db:
+        db_cursor = db.cursor()
+        try:
+            ranked = search(db_cursor, query, department=department, limit=limit + 1, after=after)
+        finally:
+            db_cursor.close()
+
+    if not ranked and after is None:
+        raise HTTPException(status_code=404, detail="No se encontraron coincidencias")
+
+    ranked, next_cursor = split_page(ranked, limit, lambda r: (r[2], r[1], r[0]))
+    if not ranked:
+        return {"query": query, "results": [], "next_cursor": None}
+
+    ids = [table_id for table_id, _, _ in ranked]
+    scores = {table_id: score for table_id, score, _ in ranked}
+    placeholders = ", ".join(["%s"] * len(ids))
+    # Las tablas se envían en streaming, en el orden del ranking
+    return stream_tables(f"""
+        SELECT t.id, t.document_id, t.page_number, t.description,
+               t.table_format, t.table_blob, t.table_data, c.chunk_blob
+        FROM extracted_tables t
+        LEFT JOIN extracted_table_chunks c ON c.table_id = t.id
+        WHERE t.id IN ({placeholders})
+        ORDER BY FIELD(t.id, {placeholders}), c.chunk_index
+    """, tuple(ids + ids), {"query": query, "next_cursor": next_cursor}, "results",
+        extra=lambda r: {"score": scores[r["id"]]})
+
+@router.get("/filter", summary="Buscar tablas por valor de una columna numérica")
+def filter_tables(
+    column: str,
+    op: str = Query("gt", pattern="^(gt|gte|lt|lte|eq)$"),
+    value: float = Query(...),
+    limit: int = Query(SEARCH_DEFAULT_LIMIT, ge=1, le=SEARCH_MAX_LIMIT),
+    department: int | None = Query(None, description="Solo admin: filtrar por departamento"),
+    user=Security(get_current_user),
+):
+    """
+    Busca tablas que tengan filas con `column` `op` `value`, por ejemplo
+    `?column=Total&op=gt&value=250000` (Total > 250000).
+
+    🔐 Requiere autenticación con JWT
+
+    - Usa los valores numéricos normalizados al extraer ('$120,000' -> 120000,
+      '97%' -> 97), no el JSON de las tablas.
+    - El nombre de columna no distingue mayúsculas ni tildes.
+    - Retorna por tabla la cantidad de filas que cumplen y su mínimo/máximo;
+      las filas se consultan en `/tables/{document_id}/{table_id}`.
+    - Admin: busca en todos los documentos, o en `department` si se indica.
+    - Usuario: busca solo en documentos de su departamento.
+    """
+    if user["rol"] != "admin":
+        department = user["department_id"] or 0
+
+    where = f"v.column_key = %s AND v.value {FILTER_OPERATORS[op]} %s"
+    params = [column_key(column), value]
+    if department is not None:
+        where = "v.department = %s AND " + where
+        params.insert(0, department or 0)
+    params.append(limit)
+
+    results = fetch_all(f"""
+        SELECT v.table_id, v.document_id, t.page_number, t.description,
+               COUNT(*) AS matched_rows, MIN(v.value) AS min_value, MAX(v.value) AS max_value
+        FROM table_numeric_values v
+        JOIN extracted_tables t ON t.id = v.table_id
+        WHERE {where}
+        GROUP BY v.table_id, v.document_id, t.page_number, t.description
+        ORDER BY v.table_id DESC
+        LIMIT %s
+    """, tuple(params))
+
+    return {"column": column, "op": op, "value": value, "results": results}
+
+@router.get("/aggregate", summary="Agregar una columna numérica de todas las tablas")
+def aggregate_tables(
+    column: str,
+    group_by: str | None = Query(None, description="Columna por la que agrupar, ej. 'Año'"),
+    department: int | None = Query(None, description="Solo admin: filtrar por departamento"),
+    user=Security(get_current_user),
+):
+    """
+    Calcula count, sum, avg, min y max de `column` en todas las tablas que la
+    tienen, agrupado por los valores de `group_by` (ej. `?column=Total Costos
+    Directos&group_by=Año`).
+
+    🔐 Requiere autenticación con JWT
+
+    - Solo participan las columnas detectadas como numéricas al extraer.
+    - Sin `group_by` retorna un único grupo "total".
+    - Admin: agrega todos los documentos, o los de `department` si se indica.
+    - Usuario: agrega solo documentos de su departamento.
+    """
+    if user["rol"] != "admin":
+        department = user["department_id"] or 0
 
-    return {"documents": documents}
+    groups, tables = aggregate_column(column, group_by=group_by, department=department)
+    return {
+        "column": column,
+        "group_by": group_by,
+        "tables": tables,
+        "groups": [{"group": key, **groups[key]} for key in sorted(groups)],
+    }
 
 @router.get("/{id}", summary="Obtener detalles de un documento")
-def get_document(id: int, user=Security(get_current_user)):
+def get_document(id: int, request: Request, response: Response, user=Security(get_current_user)):
     """
     Obtiene los detalles de un documento por su ID.
 
@@ -91,37 +428,50 @@ def get_document(id: int, user=Security(get_current_user)):
 
     - Admin: puede ver cualquier documento.
     - Usuario: solo puede ver documentos de su departamento.
+    - Con `If-None-Match` igual al ETag recibido responde 304.
     """
-    db = get_db()
-    cursor = db.cursor(dictionary=True)
-
     rol = user["rol"]
     department_id = user["department_id"]
 
     if rol == "admin":
-        cursor.execute("""
+        document = fetch_one("""
             SELECT id, filename, department, upload_date
             FROM documents
             WHERE id = %s
         """, (id,))
     else:
-        cursor.execute("""
+        document = fetch_one("""
             SELECT id, filename, department, upload_date
             FROM documents
             WHERE id = %s AND department = %s
         """, (id, department_id))
 
-    document = cursor.fetchone()
-    cursor.close()
-    db.close()
-
     if not document:
         raise HTTPException(status_code=404, detail="Documento no encontrado")
 
+    etag = make_etag("document", document["id"], document["filename"], document["department"], document["upload_date"])
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(cache_headers(etag))
+
     return {"document": document}
 
+def _check_document_access(document_id: int, user):
+    if user["rol"] == "admin":
+        doc = fetch_one("""
+            SELECT id FROM documents WHERE id = %s
+        """, (document_id,))
+    else:
+        doc = fetch_one("""
+            SELECT id FROM documents
+            WHERE id = %s AND department = %s
+        """, (document_id, user["department_id"]))
+
+    if not doc:
+        raise HTTPException(status_code=403, detail="No tienes acceso a este documento")
+
 @router.get("/tables/{document_id}", summary="Obtener tablas extraídas de un documento")
-def get_tables_by_document(document_id: int, user=Security(get_current_user)):
+def get_tables_by_document(document_id: int, request: Request, user=Security(get_current_user)):
     """
     Obtiene las tablas extraídas de un documento específico.
 
@@ -129,93 +479,90 @@ def get_tables_by_document(document_id: int, user=Security(get_current_user)):
 
     - Admin: puede acceder a cualquier documento.
     - Usuario: solo puede acceder a documentos de su departamento.
+    - La respuesta se envía en streaming: el JSON guardado de cada tabla se
+      copia a la salida sin decodificarlo, así que la memoria y el tiempo al
+      primer byte no dependen del tamaño del documento.
+    - Envía un ETag por documento; con `If-None-Match` responde 304 sin leer
+      las tablas.
     """
-    db = get_db()
-    cursor = db.cursor(dictionary=True)
-
-    rol = user["rol"]
-    department_id = user["department_id"]
-
-    if rol == "admin":
-        cursor.execute("""
-            SELECT id FROM documents WHERE id = %s
-        """, (document_id,))
-    else:
-        cursor.execute("""
-            SELECT id FROM documents
-            WHERE id = %s AND department = %s
-        """, (document_id, department_id))
-
-    doc = cursor.fetchone()
-    if not doc:
-        cursor.close()
-        db.close()
-        raise HTTPException(status_code=403, detail="No tienes acceso a este documento")
+    _check_document_access(document_id, user)
 
-    cursor.execute("""
-        SELECT id, page_number, description, table_data
+    # Las tablas no cambian después de insertarse y un reproceso las reemplaza
+    # con ids nuevos, así que (cantidad, último id) identifica el contenido.
+    # Se resuelve con el índice de document_id, sin tocar table_data.
+    summary = fetch_one("""
+        SELECT COUNT(*) AS tables, MAX(id) AS last_id
         FROM extracted_tables
         WHERE document_id = %s
     """, (document_id,))
-    results = cursor.fetchall()
-
-    cursor.close()
-    db.close()
-
-    if not results:
+    if not summary["tables"]:
         raise HTTPException(status_code=404, detail="No se encontraron tablas para este documento")
 
-    for r in results:
-        r["table_data"] = json.loads(r["table_data"])
-
-    return {"document_id": document_id, "tables": results}
-
-@router.get("/search", summary="Buscar tablas por descripción")
-def search_tables(query: str, user=Security(get_current_user)):
+    etag = make_etag("tables", document_id, summary["tables"], summary["last_id"])
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    return stream_tables("""
+        SELECT t.id, t.page_number, t.description, t.table_format, t.table_blob, t.table_data, c.chunk_blob
+        FROM extracted_tables t
+        LEFT JOIN extracted_table_chunks c ON c.table_id = t.id
+        WHERE t.document_id = %s
+        ORDER BY t.page_number, t.id, c.chunk_index
+    """, (document_id,), {"document_id": document_id}, "tables", headers=cache_headers(etag))
+
+def _column_indexes(table: dict, columns: list, rows: list, offset: int) -> list:
+    header = rows[0] if offset == 0 and rows else (read_rows(table, 0, 1) or [[]])[0]
+    try:
+        return column_indexes(header, columns)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/tables/{document_id}/{table_id}", summary="Obtener un rango de filas y columnas de una tabla")
+def get_table_rows(
+    document_id: int,
+    table_id: int,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(TABLE_ROWS_DEFAULT_LIMIT, ge=1, le=TABLE_ROWS_MAX_LIMIT),
+    columns: list[str] | None = Query(None, description="Nombres del encabezado o índices (0, 1, ...)"),
+    user=Security(get_current_user),
+):
     """
-    Busca tablas por descripción textual.
+    Obtiene las filas [offset, offset + limit) de una tabla extraída.
 
     🔐 Requiere autenticación con JWT
 
-    - La búsqueda es insensible a mayúsculas/minúsculas.
-    - Se normalizan números (ej. '400.000' ≈ '400000').
-    - Admin: busca en todos los documentos.
-    - Usuario: busca solo en documentos de su departamento.
+    - La fila 0 es el encabezado tal como se extrajo del PDF.
+    - `columns` (repetible) limita la respuesta a esas columnas, por nombre del
+      encabezado o por índice; si un número coincide con un encabezado (ej.
+      "2020") se toma como nombre.
+    - En tablas grandes solo se leen los bloques de filas del rango pedido.
+    - Admin: puede acceder a cualquier documento.
+    - Usuario: solo puede acceder a documentos de su departamento.
     """
-    db = get_db()
-    cursor = db.cursor(dictionary=True)
-
-    rol = user["rol"]
-    department_id = user["department_id"]
-
-    normalized_query = query.replace(".", "").replace(",", "").lower()
+    _check_document_access(document_id, user)
 
-    if rol == "admin":
-        cursor.execute("""
-            SELECT t.id, t.page_number, t.description, t.table_data
-            FROM extracted_tables t
-            JOIN documents d ON t.document_id = d.id
-            WHERE REPLACE(LOWER(t.description), '.', '') LIKE %s
-        """, (f"%{normalized_query}%",))
-    else:
-        cursor.execute("""
-            SELECT t.id, t.page_number, t.description, t.table_data
-            FROM extracted_tables t
-            JOIN documents d ON t.document_id = d.id
-            WHERE d.department = %s AND REPLACE(LOWER(t.description), '.', '') LIKE %s
-        """, (department_id, f"%{normalized_query}%"))
-
-    results = cursor.fetchall()
-    cursor.close()
-    db.close()
-
-    if not results:
-        raise HTTPException(status_code=404, detail="No se encontraron coincidencias")
-
-    for r in results:
-        r["table_data"] = json.loads(r["table_data"])
-
-    return {"query": query, "results": results}
+    table = fetch_one("""
+        SELECT id, page_number, description, table_format, table_blob, table_data, row_count, chunk_rows
+        FROM extracted_tables
+        WHERE id = %s AND document_id = %s
+    """, (table_id, document_id))
+    if not table:
+        raise HTTPException(status_code=404, detail="Tabla no encontrada")
+
+    rows = read_rows(table, offset, limit)
+    if columns:
+        rows = project(rows, _column_indexes(table, columns, rows, offset))
+
+    return {
+        "document_id": document_id,
+        "table_id": table_id,
+        "page_number": table["page_number"],
+        "description": table["description"],
+        "row_count": table["row_count"],
+        "offset": offset,
+        "columns": columns,
+        "rows": rows,
+    }
 
 @router.delete("/{id}", summary="Eliminar documento (solo admin)")
 def delete_document(id: int, user=Security(get_current_user)):
@@ -225,32 +572,40 @@ def delete_document(id: int, user=Security(get_current_user)):
     🔐 Requiere autenticación con JWT
 
     - Solo el administrador puede realizar esta acción.
-    - Elimina el registro en la base de datos y el archivo físico.
+    - Elimina el registro en la base de datos y el archivo físico (el PDF lo
+      borra el worker cuando ningún documento lo usa).
     """
     if user["rol"] != "admin":
         raise HTTPException(status_code=403, detail="Acceso denegado: solo el administrador puede eliminar documentos")
 
-    db = get_db()
-    cursor = db.cursor()
-
-    cursor.execute("SELECT filename FROM documents WHERE id = %s", (id,))
-    result = cursor.fetchone()
-    if not result:
-        cursor.close()
-        db.close()
-        raise HTTPException(status_code=404, detail="Documento no encontrado")
-
-    filename = result[0]
-
-    cursor.execute("DELETE FROM extracted_tables WHERE document_id = %s", (id,))
-    cursor.execute("DELETE FROM documents WHERE id = %s", (id,))
-    db.commit()
-
-    cursor.close()
-    db.close()
-
-    file_path = os.path.join("uploaded_pdfs", filename)
-    if os.path.exists(file_path):
-        os.remove(file_path)
-
-    return {"message": "Documento eliminado correctamente"}
\ No newline at end of file
+    with get_conn() as db:
+        cursor = db.cursor()
+        try:
+            cursor.execute("SELECT filename, blob_key, department FROM documents WHERE id = %s", (id,))
+            result = cursor.fetchone()
+            if not result:
+                raise HTTPException(status_code=404, detail="Documento no encontrado")
+
+            filename, blob_key, department = result
+
+            remove_document(cursor, id)
+            cursor.execute("DELETE FROM extracted_tables WHERE document_id = %s", (id,))
+            cursor.execute("DELETE FROM documents WHERE id = %s", (id,))
+
+            bump_versions(cursor, scopes_for_department(department))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            cursor.close()
+    _invalidate_listings(department)
+
+    # El blob puede compartirse con otros documentos (o con una subida en curso
+    # del mismo contenido); el worker lo borra cuando ya nadie lo usa
+    if not blob_key:
+        file_path = os.path.join(UPLOAD_FOLDER, filename)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    return {"message": "Documento eliminado correctamente"}
@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.utils.db_connection import pool_metrics, check_health
+from app.utils.password_hashing import hashing_metrics
+
+router = APIRouter(tags=['Health'])
+
+@router.get("/health", summary="Estado del servicio y del pool de conexiones")
+def health():
+    """
+    Verifica la conexión a la base de datos y retorna las métricas del pool.
+
+    - Responde 503 si el primario no responde; una réplica caída solo marca "degraded".
+    - `pool`: conexiones en uso, esperas, tiempo de espera y veces que se agotó.
+    - `password_hashing`: operaciones bcrypt en cola, rechazadas y su latencia.
+    """
+    health = check_health()
+    healthy = health["primary"]
+    return JSONResponse(
+        status_code=200 if healthy else 503,
+        content={
+            "status": "ok" if healthy and all(health["replicas"]) else "degraded",
+            "database": health,
+            "pool": pool_metrics(),
+            "password_hashing": hashing_metrics(),
+        },
+    )
@@ -1,10 +1,12 @@
 # Importación de módulos necesarios para rutas, formularios, respuestas y autenticación
-from fastapi import APIRouter, Request, Depends, Form, Response, HTTPException, status
+from fastapi import APIRouter, Request, Depends, Form, Response, HTTPException, Query, status
 from fastapi.templating import Jinja2Templates
 from app.utils.db_operations import fetch_all
+from app.utils.password_hashing import HashingOverloadedError
+from app.utils.pagination import decode_cursor, split_page, PAGE_DEFAULT_LIMIT, PAGE_MAX_LIMIT
 from app.controllers.userControllers import (
     register_user, authenticate_user, create_access_token,
-    get_current_user, get_current_admin_user, revoke_token
+    get_current_user, get_current_admin_user, revoke_token, LOGIN_TOKEN_EXPIRE_MINUTES
 )
 from datetime import timedelta
 
@@ -39,6 +41,9 @@ def register(
     try:
         user = register_user(name, email, password, rol, department_name)
         return {"message": "Usuario registrado exitosamente", "user": user}
+    except HashingOverloadedError:
+        # Lo responde el manejador de main.py con 503
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -48,13 +53,13 @@ def register(
 
 # Autenticación de usuario (POST) — pública, genera token JWT si las credenciales son válidas
 @auth_router.post("/login")
-def login(response: Response, request: Request, email: str = Form(...), password: str = Form(...)):
-    user = authenticate_user(email, password)
+async def login(response: Response, request: Request, email: str = Form(...), password: str = Form(...)):
+    user = await authenticate_user(email, password)
     if not user:
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
 
     # Generación de token JWT con duración de 24 horas
-    access_token_expires = timedelta(minutes=60 * 24)
+    access_token_expires = timedelta(minutes=LOGIN_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(data={"sub": str(user["id"])}, expires_delta=access_token_expires)
 
     return {
@@ -95,10 +100,33 @@ def logout(request: Request):
 
     return {"message": "Logged out successfully"}
 
+# Listado de usuarios (GET) — solo administradores, paginado por nombre con cursor
 @auth_router.get("/users")
-def users_list(current_admin=Depends(get_current_admin_user)):
-    users = fetch_all("SELECT id, name, email, rol FROM users ORDER BY name")
-    return {"users": users}
+def users_list(
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    cursor: str | None = Query(None),
+    current_admin=Depends(get_current_admin_user)
+):
+    if cursor is None:
+        users = fetch_all("""
+            SELECT id, name, email, rol FROM users
+            ORDER BY name, id
+            LIMIT %s
+        """, (limit + 1,))
+    else:
+        try:
+            name, last_id = decode_cursor(cursor, 2)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        users = fetch_all("""
+            SELECT id, name, email, rol FROM users
+            WHERE name > %s OR (name = %s AND id > %s)
+            ORDER BY name, id
+            LIMIT %s
+        """, (name, name, last_id, limit + 1))
+
+    users, next_cursor = split_page(users, limit, lambda u: (u["name"], u["id"]))
+    return {"users": users, "next_cursor": next_cursor}
 
 @auth_router.get("/register/data")
 def get_register_data(current_admin=Depends(get_current_admin_user)):
@@ -0,0 +1,38 @@
+"""
+Contadores de versión por ámbito (departamento o "all" para el admin).
+
+Se incrementan en la misma transacción que modifica los documentos de ese
+ámbito, así que cualquier proceso puede saber si lo que tiene cacheado sigue
+vigente consultando una fila por clave primaria.
+"""
+from .db_operations import fetch_all
+
+SCOPE_ALL = "all"
+
+def department_scope(department: int | None) -> str:
+    return f"department:{department or 0}"
+
+def scopes_for_department(department: int | None) -> list:
+    """Ámbitos afectados por un cambio en documentos de ese departamento."""
+    return [department_scope(department), SCOPE_ALL]
+
+def bump_versions(cursor, scopes: list):
+    """Incrementa la versión de los ámbitos, dentro de la transacción del cursor."""
+    scopes = sorted(set(scopes))
+    if not scopes:
+        return
+    # Orden fijo de las filas para no provocar deadlocks entre transacciones
+    cursor.execute(
+        "INSERT INTO cache_versions (scope, version, updated_at) VALUES "
+        + ", ".join(["(%s, 1, NOW())"] * len(scopes))
+        + " ON DUPLICATE KEY UPDATE version = version + 1, updated_at = NOW()",
+        scopes,
+    )
+
+def get_versions(scopes: list) -> dict:
+    """Retorna {ámbito: versión}; los ámbitos nunca modificados tienen versión 0."""
+    placeholders = ", ".join(["%s"] * len(scopes))
+    rows = fetch_all(f"SELECT scope, version FROM cache_versions WHERE scope IN ({placeholders})", tuple(scopes))
+    versions = {scope: 0 for scope in scopes}
+    versions.update({row["scope"]: row["version"] for row in rows})
+    return versions
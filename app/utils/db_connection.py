@@ -1,8 +1,11 @@
 import os
+import threading
+import time
+from contextvars import ContextVar
 from dotenv import load_dotenv
 from mysql.connector.pooling import MySQLConnectionPool
-from mysql.connector import Error
-from contextlib import contextmanager
+from mysql.connector import Error, InterfaceError
+from contextlib import contextmanager, ExitStack
 
 load_dotenv()
 
@@ -12,44 +15,303 @@ DB_HOST = os.getenv("DB_HOST", "127.0.0.1")
 DB_PORT = int(os.getenv("DB_PORT", "3306"))
 DB_NAME = os.getenv("DB_NAME", "docsflow")
 POOL_NAME = os.getenv("DB_POOL_NAME", "app_pool")
-POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+# Segundos que una petición espera por una conexión libre antes de fallar
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
 
-_pool: MySQLConnectionPool | None = None
+# Réplicas de solo lectura: "host:puerto,host2:puerto" (vacío = todo va al primario)
+DB_REPLICA_HOSTS = os.getenv("DB_REPLICA_HOSTS", "")
+DB_REPLICA_POOL_SIZE = int(os.getenv("DB_REPLICA_POOL_SIZE", str(POOL_SIZE)))
+# Tras escribir, las lecturas del mismo cliente van al primario durante este
+# tiempo, para que vean sus propios cambios aunque la réplica tenga retraso
+READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "2"))
+# Cookie con el momento de la última escritura del cliente: la ven todos los
+# procesos, no solo el que atendió la escritura
+READ_YOUR_WRITES_COOKIE = "docsflow_last_write"
+# Una réplica que falla al conectar se deja de usar durante este tiempo
+REPLICA_RETRY_SECONDS = float(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))
 
-def _ensure_pool():
-    global _pool
-    if _pool is None:
+class PoolExhaustedError(RuntimeError):
+    """No se liberó ninguna conexión del pool dentro de DB_POOL_TIMEOUT."""
+
+class _ConnectionPool:
+    """
+    Pool de mysql-connector con espera acotada y métricas.
+
+    El pool de mysql-connector falla en cuanto se agota; el semáforo agrega la
+    espera de hasta DB_POOL_TIMEOUT segundos.
+    """
+
+    def __init__(self, name: str, host: str, port: int, size: int):
+        self.name = name
+        self.host = host
+        self.port = port
+        self.size = size
+        self._pool: MySQLConnectionPool | None = None
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self.down_until = 0.0
+        self._metrics = {
+            "acquired": 0,
+            "in_use": 0,
+            "max_in_use": 0,
+            "waited": 0,
+            "wait_time_total_ms": 0.0,
+            "wait_time_max_ms": 0.0,
+            "exhausted": 0,
+            "health_check_failures": 0,
+        }
+
+    def _ensure_pool(self):
+        if self._pool is not None:
+            return
+        with self._lock:
+            if self._pool is None:
+                try:
+                    self._pool = MySQLConnectionPool(
+                        pool_name=self.name,
+                        pool_size=self.size,
+                        host=self.host,
+                        port=self.port,
+                        user=DB_USER,
+                        password=DB_PASS,
+                        database=DB_NAME,
+                        autocommit=False,
+                    )
+                except Error as e:
+                    raise RuntimeError(f"Error creando el pool de conexiones ({self.name}): {e}")
+
+    def _count(self, name: str):
+        with self._lock:
+            self._metrics[name] += 1
+
+    def _record_acquire(self, waited_ms: float):
+        with self._lock:
+            m = self._metrics
+            m["acquired"] += 1
+            m["in_use"] += 1
+            m["max_in_use"] = max(m["max_in_use"], m["in_use"])
+            if waited_ms >= 1:
+                m["waited"] += 1
+            m["wait_time_total_ms"] += waited_ms
+            m["wait_time_max_ms"] = max(m["wait_time_max_ms"], waited_ms)
+
+    def _checkout(self):
+        # get_connection hace ping a la conexión y la reconecta si el servidor la
+        # cerró; si la reconexión falla se reintenta una vez con otra del pool
         try:
-            _pool = MySQLConnectionPool(
-                pool_name=POOL_NAME,
-                pool_size=POOL_SIZE,
-                host=DB_HOST,
-                port=DB_PORT,
-                user=DB_USER,
-                password=DB_PASS,
-                database=DB_NAME,
-                autocommit=False,
-            )
-        except Error as e:
-            raise RuntimeError(f"Error creando el pool de conexiones: {e}")
+            return self._pool.get_connection()
+        except InterfaceError:
+            self._count("health_check_failures")
+            return self._pool.get_connection()
+
+    @contextmanager
+    def connection(self):
+        self._ensure_pool()
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=POOL_TIMEOUT):
+            self._count("exhausted")
+            raise PoolExhaustedError(f"No hay conexiones libres en el pool {self.name} tras {POOL_TIMEOUT}s")
 
-@contextmanager
-def get_conn():
-    _ensure_pool()
-    conn = _pool.get_connection()
-    try:
-        yield conn
-    finally:
         try:
-            if conn.is_connected():
-                conn.close()
+            conn = self._checkout()
         except Exception:
-            pass
+            self._slots.release()
+            raise
+        self._record_acquire((time.monotonic() - start) * 1000)
 
-def close_pool():
-    global _pool
-    if _pool is not None:
         try:
-            _pool = None
+            yield conn
         finally:
-            _pool = None
\ No newline at end of file
+            try:
+                # Devuelve la conexión al pool (con reset de sesión), aunque esté caída
+                conn.close()
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._metrics["in_use"] -= 1
+                self._slots.release()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics["host"] = f"{self.host}:{self.port}"
+        metrics["pool_size"] = self.size
+        metrics["available"] = self.size - metrics["in_use"]
+        metrics["wait_time_avg_ms"] = metrics["wait_time_total_ms"] / metrics["acquired"] if metrics["acquired"] else 0.0
+        return metrics
+
+    def check_health(self) -> bool:
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute("SELECT 1")
+                    cursor.fetchone()
+                    return True
+                finally:
+                    cursor.close()
+        except Exception:
+            self._count("health_check_failures")
+            return False
+
+    def close(self):
+        if self._pool is not None:
+            try:
+                self._pool._remove_connections()
+            finally:
+                self._pool = None
+
+def _parse_hosts(value: str) -> list:
+    hosts = []
+    for item in value.split(","):
+        item = item.strip()
+        if item:
+            host, _, port = item.partition(":")
+            hosts.append((host, int(port or DB_PORT)))
+    return hosts
+
+_primary = _ConnectionPool(POOL_NAME, DB_HOST, DB_PORT, POOL_SIZE)
+_replicas = [
+    _ConnectionPool(f"{POOL_NAME}_replica{i}", host, port, DB_REPLICA_POOL_SIZE)
+    for i, (host, port) in enumerate(_parse_hosts(DB_REPLICA_HOSTS))
+]
+_replica_cursor = 0
+_replica_lock = threading.Lock()
+
+class _WriteState:
+    """Momento (epoch) de la última escritura confirmada del cliente."""
+
+    def __init__(self, last_write: float = 0.0):
+        self.last_write = last_write
+        self.wrote = False
+
+# Estado de la petición actual (lo fija el middleware). Se guarda un objeto y
+# no el valor: las rutas síncronas corren en el threadpool con una copia del
+# contexto, y así sus escrituras se ven al terminar la petición
+_request_state: ContextVar[_WriteState | None] = ContextVar("db_request_state", default=None)
+# Fuera de una petición (worker, scripts) cada hilo lleva su propio estado
+_thread_state = threading.local()
+
+def begin_request(last_write: float = 0.0):
+    """
+    Inicia el seguimiento de escrituras de una petición. `last_write` es el
+    valor de la cookie READ_YOUR_WRITES_COOKIE. Retorna el token para `end_request`.
+    """
+    return _request_state.set(_WriteState(min(last_write, time.time())))
+
+def end_request(token) -> float | None:
+    """Termina la petición; retorna el momento de su última escritura, o None si no escribió."""
+    state = _request_state.get()
+    _request_state.reset(token)
+    return state.last_write if state is not None and state.wrote else None
+
+def _state() -> _WriteState:
+    state = _request_state.get()
+    if state is None:
+        state = getattr(_thread_state, "state", None)
+        if state is None:
+            state = _thread_state.state = _WriteState()
+    return state
+
+def _mark_write():
+    state = _state()
+    state.last_write = time.time()
+    state.wrote = True
+
+def _wrote_recently() -> bool:
+    last = _state().last_write
+    return last > 0 and time.time() - last < READ_YOUR_WRITES_SECONDS
+
+class _TrackedConnection:
+    """Conexión del primario que registra la escritura al confirmar (commit)."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def commit(self):
+        self._conn.commit()
+        # La ventana de "leer lo propio" se cuenta desde el commit
+        _mark_write()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+def _next_replica():
+    global _replica_cursor
+    now = time.monotonic()
+    with _replica_lock:
+        for _ in range(len(_replicas)):
+            replica = _replicas[_replica_cursor % len(_replicas)]
+            _replica_cursor += 1
+            if replica.down_until <= now:
+                return replica
+    return None
+
+@contextmanager
+def get_conn(readonly: bool = False):
+    """
+    Entrega una conexión del pool y la devuelve al salir del bloque.
+
+    Con `readonly=True` se usa una réplica (si hay configuradas), salvo que la
+    cliente haya escrito hace menos de DB_READ_YOUR_WRITES_SECONDS. Si la réplica
+    no responde se lee del primario. Sin `readonly` se usa el primario; solo
+    un commit cuenta como escritura.
+
+    Si el pool está ocupado espera hasta DB_POOL_TIMEOUT segundos por una
+    conexión libre y luego lanza PoolExhaustedError.
+    """
+    if readonly and _replicas and not _wrote_recently():
+        replica = _next_replica()
+        if replica is not None:
+            stack = ExitStack()
+            try:
+                conn = stack.enter_context(replica.connection())
+            except PoolExhaustedError:
+                raise
+            except (Error, RuntimeError) as e:
+                replica.down_until = time.monotonic() + REPLICA_RETRY_SECONDS
+                print(f"⚠️ Réplica {replica.host}:{replica.port} no disponible, leyendo del primario:", e)
+            else:
+                with stack:
+                    yield conn
+                return
+
+    if readonly:
+        with _primary.connection() as conn:
+            yield conn
+        return
+
+    with _primary.connection() as conn:
+        yield _TrackedConnection(conn)
+
+def discard_connection(conn):
+    """
+    Cierra el socket de una conexión del pool sin leer los resultados
+    pendientes (consumirlos puede tardar tanto como la consulta entera). La
+    conexión vuelve al pool al salir de get_conn y se reconecta en el
+    siguiente uso (ver _checkout).
+    """
+    cnx = getattr(conn, "_cnx", None) or conn
+    try:
+        cnx.disconnect()
+    except Exception:
+        pass
+
+def pool_metrics() -> dict:
+    return {
+        "primary": _primary.metrics(),
+        "replicas": [dict(r.metrics(), down=r.down_until > time.monotonic()) for r in _replicas],
+    }
+
+def check_health() -> dict:
+    """Ejecuta un SELECT 1 en el primario y en cada réplica."""
+    return {
+        "primary": _primary.check_health(),
+        "replicas": [r.check_health() for r in _replicas],
+    }
+
+def close_pool():
+    for pool in [_primary] + _replicas:
+        pool.close()
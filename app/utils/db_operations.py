@@ -1,18 +1,16 @@
 from .db_connection import get_conn
+from .table_codec import encode_table, encode_chunks, FORMAT_CHUNKED, TABLE_CHUNK_ROWS
 import mysql.connector
 from dotenv import load_dotenv
 import os
 
-def get_db():
-    return mysql.connector.connect(
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASS"),
-        database=os.getenv("DB_NAME")
-    )
+# Filas por sentencia INSERT en las inserciones masivas
+INSERT_BATCH_SIZE = int(os.getenv("DB_INSERT_BATCH_SIZE", "200"))
+# Los bloques de filas son grandes; menos por sentencia para no superar max_allowed_packet
+CHUNK_INSERT_BATCH_SIZE = int(os.getenv("DB_CHUNK_INSERT_BATCH_SIZE", "20"))
 
 def fetch_one(query: str, params: tuple | dict | None = None):
-    with get_conn() as conn:
+    with get_conn(readonly=True) as conn:
         cursor = conn.cursor(dictionary=True)
         try:
             cursor.execute(query, params or ())
@@ -22,7 +20,7 @@ def fetch_one(query: str, params: tuple | dict | None = None):
             cursor.close()
 
 def fetch_all(query: str, params: tuple | dict | None = None):
-    with get_conn() as conn:
+    with get_conn(readonly=True) as conn:
         cursor = conn.cursor(dictionary=True)
         try:
             cursor.execute(query, params or ())
@@ -44,41 +42,110 @@ def execute(query: str, params: tuple | dict | None = None):
         finally:
             cursor.close()
 
+def bulk_insert(cursor, table: str, columns: list, rows: list, batch_size: int | None = None) -> list:
+    """
+    Inserta filas con INSERT multi-fila, `batch_size` filas por sentencia.
+
+    No hace commit: las sentencias quedan en la transacción del cursor recibido.
+    Retorna los ids AUTO_INCREMENT generados, en el orden de `rows`.
+    """
+    if not rows:
+        return []
+    batch_size = batch_size or INSERT_BATCH_SIZE
+    cols = ", ".join(f"`{c}`" for c in columns)
+    row_placeholder = "(" + ", ".join(["%s"] * len(columns)) + ")"
+
+    cursor.execute("SELECT @@auto_increment_increment AS increment")
+    row = cursor.fetchone()
+    increment = row["increment"] if isinstance(row, dict) else row[0]
+
+    ids = []
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        sql = f"INSERT INTO `{table}` ({cols}) VALUES " + ", ".join([row_placeholder] * len(batch))
+        cursor.execute(sql, [value for row in batch for value in row])
+        # InnoDB asigna ids consecutivos a las filas de un mismo INSERT simple
+        # (cantidad de filas conocida); lastrowid es el id de la primera
+        ids.extend(cursor.lastrowid + i * increment for i in range(len(batch)))
+    return ids
+
+def _table_row(document_id: int, table: dict) -> tuple:
+    data = table["data"]
+    if len(data) > TABLE_CHUNK_ROWS:
+        return (document_id, table["page"], table["description"], FORMAT_CHUNKED, None, len(data), TABLE_CHUNK_ROWS)
+    return (document_id, table["page"], table["description"], *encode_table(data), len(data), None)
+
+def insert_table_chunks(cursor, table_id: int, data: list, chunk_rows: int):
+    """Inserta las filas de una tabla de formato 2 en bloques de `chunk_rows`."""
+    chunks = encode_chunks(data, chunk_rows)
+    rows = [(table_id, index, len(data[index * chunk_rows:(index + 1) * chunk_rows]), blob)
+            for index, blob in enumerate(chunks)]
+    bulk_insert(cursor, "extracted_table_chunks", ["table_id", "chunk_index", "row_count", "chunk_blob"],
+                rows, CHUNK_INSERT_BATCH_SIZE)
+
+def _insert_tables(cursor, document_id: int, tables: list, batch_size: int | None) -> list:
+    rows = [_table_row(document_id, t) for t in tables]
+    columns = ["document_id", "page_number", "description", "table_format", "table_blob", "row_count", "chunk_rows"]
+    ids = bulk_insert(cursor, "extracted_tables", columns, rows, batch_size)
+    for table_id, table, row in zip(ids, tables, rows):
+        if row[3] == FORMAT_CHUNKED:
+            insert_table_chunks(cursor, table_id, table["data"], row[6])
+    return ids
+
+def insert_extracted_tables(document_id: int, tables: list, cursor=None, batch_size: int | None = None) -> list:
+    """
+    Inserta las tablas extraídas de un documento en lotes multi-fila, con
+    `table_data` comprimido (ver table_codec). Las tablas de más de
+    TABLE_CHUNK_ROWS filas se guardan en bloques.
+
+    Con `cursor` las filas entran en la transacción del llamador; sin él se
+    usa una conexión del pool y todo se confirma en una sola transacción.
+    Retorna los ids de las tablas insertadas.
+    """
+    if not tables:
+        return []
+
+    if cursor is not None:
+        return _insert_tables(cursor, document_id, tables, batch_size)
+
+    with get_conn() as conn:
+        cur = conn.cursor()
+        try:
+            ids = _insert_tables(cur, document_id, tables, batch_size)
+            conn.commit()
+            return ids
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
 def execute_query(query: str, params: tuple = None, fetch_one: bool = False, fetch_all: bool = False):
     """
     Ejecuta una consulta SQL y maneja los resultados y errores.
     
     Retorna los resultados de la consulta o un booleano para operaciones de escritura.
     """
-    conn = None
-    cursor = None
     try:
-        conn = get_db()
-        if conn is None:
-            # Si no hay conexión, retorna None o False
-            return None
-            
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query, params)
-        
-        # Lógica para manejar SELECT, INSERT, UPDATE, DELETE
-        if query.strip().lower().startswith("select"):
-            if fetch_one:
-                return cursor.fetchone()
-            if fetch_all:
-                return cursor.fetchall()
-        else:
-            conn.commit()
-            return True
-            
+        with get_conn() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(query, params)
+
+                # Lógica para manejar SELECT, INSERT, UPDATE, DELETE
+                if query.strip().lower().startswith("select"):
+                    if fetch_one:
+                        return cursor.fetchone()
+                    if fetch_all:
+                        return cursor.fetchall()
+                else:
+                    conn.commit()
+                    return True
+            except mysql.connector.Error:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
     except mysql.connector.Error as err:
         print(f"Error en la base de datos al ejecutar la consulta: {err}")
-        if conn:
-            conn.rollback()
         return False
-    finally:
-        # Asegúrate de que el cursor y la conexión se cierren, incluso si hay un error
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
\ No newline at end of file
@@ -0,0 +1,105 @@
+import json
+import os
+import zlib
+
+from .db_operations import fetch_one, fetch_all, execute
+from .pdf_processor import extractor_version
+
+# Tamaño total máximo de la caché; al superarlo se expulsan las entradas menos usadas
+EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+# Resultados más grandes que esto no se cachean (se procesan en streaming)
+EXTRACTION_CACHE_MAX_ENTRY_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRY_BYTES", str(16 * 1024 * 1024)))
+
+COUNTERS = ("hits", "misses", "stores", "evictions")
+
+def _count(name: str, amount: int = 1):
+    # Los contadores van en la BD: las búsquedas las hace el worker y las
+    # estadísticas las consulta la API, en otro proceso
+    try:
+        execute("""
+            INSERT INTO extraction_cache_counters (name, value) VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE value = value + VALUES(value)
+        """, (name, amount))
+    except Exception as e:
+        print("⚠️ No se pudo actualizar el contador de la caché de extracción:", e)
+
+def get_cached_tables(content_hash: str):
+    """Retorna las tablas cacheadas para ese contenido y versión del extractor, o None."""
+    version = extractor_version()
+    row = fetch_one("""
+        SELECT payload FROM extraction_cache
+        WHERE content_hash = %s AND extractor_version = %s
+    """, (content_hash, version))
+    if not row:
+        _count("misses")
+        return None
+
+    _count("hits")
+    execute("""
+        UPDATE extraction_cache SET hits = hits + 1, last_used_at = NOW()
+        WHERE content_hash = %s AND extractor_version = %s
+    """, (content_hash, version))
+    return json.loads(zlib.decompress(row["payload"]))
+
+def store_tables(content_hash: str, tables: list) -> bool:
+    """Guarda el resultado de una extracción. Retorna False si es demasiado grande."""
+    payload = zlib.compress(json.dumps(tables).encode("utf-8"))
+    if len(payload) > EXTRACTION_CACHE_MAX_ENTRY_BYTES:
+        return False
+
+    execute("""
+        INSERT INTO extraction_cache
+            (content_hash, extractor_version, payload, size_bytes, table_count, created_at, last_used_at)
+        VALUES (%s, %s, %s, %s, %s, NOW(), NOW())
+        ON DUPLICATE KEY UPDATE
+            payload = VALUES(payload), size_bytes = VALUES(size_bytes),
+            table_count = VALUES(table_count), last_used_at = NOW()
+    """, (content_hash, extractor_version(), payload, len(payload), len(tables)))
+    _count("stores")
+    evict()
+    return True
+
+def evict() -> int:
+    """Expulsa las entradas usadas hace más tiempo hasta quedar bajo EXTRACTION_CACHE_MAX_BYTES."""
+    total = fetch_one("SELECT COALESCE(SUM(size_bytes), 0) AS total FROM extraction_cache")["total"]
+    excess = int(total) - EXTRACTION_CACHE_MAX_BYTES
+    if excess <= 0:
+        return 0
+
+    victims = []
+    for row in fetch_all("""
+        SELECT content_hash, extractor_version, size_bytes
+        FROM extraction_cache
+        ORDER BY last_used_at
+        LIMIT 1000
+    """):
+        victims.append(row)
+        excess -= row["size_bytes"]
+        if excess <= 0:
+            break
+
+    for row in victims:
+        execute("""
+            DELETE FROM extraction_cache WHERE content_hash = %s AND extractor_version = %s
+        """, (row["content_hash"], row["extractor_version"]))
+    if victims:
+        _count("evictions", len(victims))
+    return len(victims)
+
+def cache_stats() -> dict:
+    """Contadores acumulados de todos los procesos y totales de la caché en la BD."""
+    counters = dict.fromkeys(COUNTERS, 0)
+    for row in fetch_all("SELECT name, value FROM extraction_cache_counters"):
+        if row["name"] in counters:
+            counters[row["name"]] = int(row["value"])
+    lookups = counters["hits"] + counters["misses"]
+    counters["hit_rate"] = counters["hits"] / lookups if lookups else 0.0
+
+    totals = fetch_one("""
+        SELECT COUNT(*) AS entries, COALESCE(SUM(size_bytes), 0) AS size_bytes,
+               COALESCE(SUM(hits), 0) AS total_hits
+        FROM extraction_cache
+    """)
+    counters.update({k: int(v) for k, v in totals.items()})
+    counters["max_bytes"] = EXTRACTION_CACHE_MAX_BYTES
+    return counters
@@ -1,12 +1,124 @@
+import hashlib
 import os
-from datetime import datetime
+import tempfile
+import time
 
 UPLOAD_FOLDER = "uploaded_pdfs"
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-
-def save_pdf(file):
-    filename = f"{file.filename}"
-    file_path = os.path.join(UPLOAD_FOLDER, filename)
-    with open(file_path, "wb") as f:
-        f.write(file.file.read())
-    return filename, file_path
+# Los archivos a medio escribir viven aquí; al estar en el mismo sistema de
+# archivos, el rename final es atómico
+TMP_FOLDER = os.path.join(UPLOAD_FOLDER, "tmp")
+CHUNK_SIZE = 1024 * 1024
+# Un blob sin documentos solo se borra si no se escribió en este tiempo: cubre
+# el lapso entre save_stream y el INSERT del documento que lo usa
+BLOB_SWEEP_GRACE_SECONDS = int(os.getenv("BLOB_SWEEP_GRACE_SECONDS", "3600"))
+BLOB_SWEEP_BATCH = 500
+os.makedirs(TMP_FOLDER, exist_ok=True)
+
+class FileTooLargeError(ValueError):
+    """El stream superó el tamaño máximo permitido."""
+
+def blob_path(blob_key: str) -> str:
+    """Ruta del blob: uploaded_pdfs/ab/cd/abcd....pdf (sharding por prefijo del hash)."""
+    return os.path.join(UPLOAD_FOLDER, blob_key[:2], blob_key[2:4], f"{blob_key}.pdf")
+
+def save_stream(stream, max_bytes: int | None = None):
+    """
+    Guarda el contenido de un stream en el almacén direccionado por contenido.
+
+    Se copia por bloques a un archivo temporal mientras se calcula su SHA-256 y
+    luego se renombra a su ruta definitiva. Si ya existe un blob con el mismo
+    hash se reemplaza por el temporal (mismo contenido): cada contenido se
+    guarda una sola vez y el blob queda recién escrito, así `sweep_blobs` no
+    lo borra aunque aún no exista el documento que lo usa.
+
+    Con `max_bytes`, lanza FileTooLargeError apenas el contenido lo supera (sin
+    dejar archivos). Retorna (blob_key, file_path).
+    """
+    sha = hashlib.sha256()
+    written = 0
+    fd, tmp_path = tempfile.mkstemp(dir=TMP_FOLDER, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if max_bytes is not None and written > max_bytes:
+                    raise FileTooLargeError(f"El archivo supera {max_bytes} bytes")
+                sha.update(chunk)
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+
+        blob_key = sha.hexdigest()
+        file_path = blob_path(blob_key)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        os.replace(tmp_path, file_path)
+        return blob_key, file_path
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def save_pdf(file, max_bytes: int | None = None):
+    """Guarda un UploadFile. Retorna (filename, blob_key, file_path)."""
+    filename = os.path.basename(file.filename or "") or "documento.pdf"
+    blob_key, file_path = save_stream(file.file, max_bytes=max_bytes)
+    return filename, blob_key, file_path
+
+def _old_blobs(cutoff: float):
+    """Genera (blob_key, ruta) de los blobs escritos antes de `cutoff`."""
+    for root, dirs, files in os.walk(UPLOAD_FOLDER):
+        if root == UPLOAD_FOLDER:
+            dirs[:] = [d for d in dirs if len(d) == 2]
+        for name in files:
+            path = os.path.join(root, name)
+            key, ext = os.path.splitext(name)
+            if ext != ".pdf" or len(key) != 64:
+                continue
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    yield key, path
+            except FileNotFoundError:
+                continue
+
+def _discard_blob(path: str, cutoff: float) -> bool:
+    # Se aparta con un rename atómico y se vuelve a mirar su fecha: si una
+    # subida lo reescribió entre la consulta y este punto, se devuelve a su lugar
+    trash = os.path.join(TMP_FOLDER, f"{os.path.basename(path)}.{os.getpid()}.trash")
+    try:
+        os.replace(path, trash)
+    except FileNotFoundError:
+        return False
+    if os.path.getmtime(trash) >= cutoff and not os.path.exists(path):
+        os.replace(trash, path)
+        return False
+    os.remove(trash)
+    return True
+
+def sweep_blobs(referenced) -> int:
+    """
+    Borra los blobs que ningún documento usa y que no se escribieron en los
+    últimos BLOB_SWEEP_GRACE_SECONDS. `referenced(claves)` retorna el
+    subconjunto de claves que aún tienen documentos. Retorna cuántos borró.
+    """
+    cutoff = time.time() - BLOB_SWEEP_GRACE_SECONDS
+    removed = 0
+    batch = []
+
+    def flush():
+        nonlocal removed
+        keep = referenced([key for key, _ in batch])
+        for key, path in batch:
+            if key not in keep and _discard_blob(path, cutoff):
+                removed += 1
+        batch.clear()
+
+    for blob in _old_blobs(cutoff):
+        batch.append(blob)
+        if len(batch) >= BLOB_SWEEP_BATCH:
+            flush()
+    if batch:
+        flush()
+    return removed
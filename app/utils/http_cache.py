@@ -0,0 +1,30 @@
+import hashlib
+
+from fastapi import Request, Response
+
+# El navegador puede guardar la respuesta pero debe revalidarla con el ETag
+CACHE_CONTROL = "private, no-cache"
+
+def make_etag(*parts) -> str:
+    """ETag fuerte a partir de los valores que identifican la versión del recurso."""
+    digest = hashlib.sha256(":".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:32]
+    return f'"{digest}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True si el If-None-Match de la petición incluye `etag` (o es "*")."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+def cache_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
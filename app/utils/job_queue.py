@@ -0,0 +1,106 @@
+import os
+from .db_connection import get_conn
+from .db_operations import fetch_one, execute, bulk_insert
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# Un trabajo "running" cuyo heartbeat sea más viejo que esto se considera huérfano
+# (el worker murió) y vuelve a la cola.
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "600"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+def enqueue_jobs(cursor, jobs: list) -> list:
+    """Encola varios trabajos [(document_id, file_path), ...] en la transacción del llamador."""
+    rows = [(document_id, file_path, JOB_QUEUED) for document_id, file_path in jobs]
+    return bulk_insert(cursor, "extraction_jobs", ["document_id", "file_path", "status"], rows)
+
+def claim_next_job(worker_id: str):
+    """
+    Toma el siguiente trabajo en cola y lo marca como 'running'.
+
+    Usa SELECT ... FOR UPDATE SKIP LOCKED para que varios workers puedan
+    reclamar trabajos a la vez sin pisarse. Retorna None si no hay trabajos.
+    """
+    with get_conn() as conn:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("""
+                SELECT id, document_id, file_path, attempts
+                FROM extraction_jobs
+                WHERE status = %s
+                ORDER BY id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            """, (JOB_QUEUED,))
+            job = cursor.fetchone()
+            if not job:
+                conn.commit()
+                return None
+
+            cursor.execute("""
+                UPDATE extraction_jobs
+                SET status = %s, worker_id = %s, attempts = attempts + 1,
+                    started_at = NOW(), heartbeat_at = NOW(), tables_found = 0, error = NULL
+                WHERE id = %s
+            """, (JOB_RUNNING, worker_id, job["id"]))
+            conn.commit()
+            job["attempts"] += 1
+            return job
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+def update_progress(job_id: int, tables_found: int):
+    execute("""
+        UPDATE extraction_jobs SET tables_found = %s, heartbeat_at = NOW()
+        WHERE id = %s
+    """, (tables_found, job_id))
+
+def complete_job(job_id: int, tables_found: int):
+    execute("""
+        UPDATE extraction_jobs
+        SET status = %s, tables_found = %s, finished_at = NOW(), heartbeat_at = NOW()
+        WHERE id = %s
+    """, (JOB_DONE, tables_found, job_id))
+
+def fail_job(job_id: int, error: str, attempts: int):
+    """Marca el trabajo como fallido, o lo devuelve a la cola si le quedan intentos."""
+    status = JOB_QUEUED if attempts < JOB_MAX_ATTEMPTS else JOB_FAILED
+    execute("""
+        UPDATE extraction_jobs
+        SET status = %s, error = %s, finished_at = NOW()
+        WHERE id = %s
+    """, (status, error[:2000], job_id))
+    return status
+
+def requeue_stale_jobs() -> int:
+    """Devuelve a la cola los trabajos 'running' de workers que dejaron de latir."""
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                UPDATE extraction_jobs
+                SET status = %s, worker_id = NULL
+                WHERE status = %s AND heartbeat_at < NOW() - INTERVAL %s SECOND
+            """, (JOB_QUEUED, JOB_RUNNING, JOB_STALE_SECONDS))
+            conn.commit()
+            return cursor.rowcount
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+def get_job(job_id: int):
+    return fetch_one("""
+        SELECT j.id, j.document_id, j.status, j.tables_found, j.attempts, j.error,
+               j.created_at, j.started_at, j.finished_at, d.department
+        FROM extraction_jobs j
+        JOIN documents d ON j.document_id = d.id
+        WHERE j.id = %s
+    """, (job_id,))
@@ -0,0 +1,50 @@
+import base64
+import json
+from datetime import datetime
+
+PAGE_DEFAULT_LIMIT = 50
+PAGE_MAX_LIMIT = 200
+
+def encode_cursor(*values) -> str:
+    """Cursor opaco con los valores de orden de la última fila de la página."""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, size: int, datetimes: tuple = ()) -> list:
+    """
+    Decodifica un cursor de `encode_cursor` con `size` valores.
+
+    Las posiciones de `datetimes` se convierten de vuelta a datetime.
+    Lanza ValueError si el cursor no es válido.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Cursor inválido")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Cursor inválido")
+    # Los valores terminan como parámetros de SQL: solo escalares
+    if any(isinstance(v, bool) or not isinstance(v, (str, int, float)) for v in values):
+        raise ValueError("Cursor inválido")
+    for i in datetimes:
+        if not isinstance(values[i], str):
+            raise ValueError("Cursor inválido")
+        try:
+            values[i] = datetime.fromisoformat(values[i])
+        except ValueError:
+            raise ValueError("Cursor inválido")
+    return values
+
+def split_page(rows: list, limit: int, key) -> tuple:
+    """
+    Recibe hasta `limit` + 1 filas y retorna (página, next_cursor).
+
+    `key(fila)` da los valores de orden con los que se arma el cursor; si no
+    hay fila extra no hay página siguiente.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(*key(page[-1]))
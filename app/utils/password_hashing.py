@@ -0,0 +1,132 @@
+"""
+Hash y verificación de contraseñas (bcrypt) en un pool de procesos propio.
+
+bcrypt consume ~250 ms de CPU por operación; ejecutarlo en el threadpool de
+FastAPI o dentro de un handler async deja sin hilos (o sin event loop) al
+resto de las peticiones. Aquí corre en PASSWORD_HASH_WORKERS procesos y se
+admiten como mucho PASSWORD_HASH_MAX_PENDING operaciones a la vez (en
+ejecución + en cola): las demás fallan de inmediato con
+HashingOverloadedError, que la API responde con 503.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from passlib.context import CryptContext
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+# Costo de bcrypt; al cambiarlo, los hashes anteriores se rehacen en el siguiente login
+PASSWORD_BCRYPT_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", "12"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=PASSWORD_BCRYPT_ROUNDS)
+
+class HashingOverloadedError(Exception):
+    """Hay demasiadas operaciones de hash pendientes; reintentar en breve."""
+
+_executor: ProcessPoolExecutor | None = None
+_lock = threading.Lock()
+_pending = 0
+_metrics = {
+    "completed": 0,
+    "rejected": 0,
+    "failed": 0,
+    "max_pending": 0,
+    "latency_total_ms": 0.0,
+    "latency_max_ms": 0.0,
+    "run_time_total_ms": 0.0,
+}
+
+# Funciones que se ejecutan en el proceso hijo; retornan (resultado, segundos de CPU)
+def _hash(password: str):
+    start = time.perf_counter()
+    return pwd_context.hash(password), time.perf_counter() - start
+
+def _verify_and_update(password: str, hashed: str):
+    start = time.perf_counter()
+    try:
+        result = pwd_context.verify_and_update(password, hashed)
+    except (ValueError, TypeError):
+        # Hash vacío o con formato desconocido
+        result = (False, None)
+    return result, time.perf_counter() - start
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: hacer fork de la API (con hilos y sockets abiertos) puede
+        # heredar locks tomados por otros hilos y dejar al hijo bloqueado
+        _executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+def shutdown_executor():
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+def _submit(fn, *args):
+    global _pending
+    with _lock:
+        if _pending >= PASSWORD_HASH_MAX_PENDING:
+            _metrics["rejected"] += 1
+            raise HashingOverloadedError("Demasiadas operaciones de contraseña pendientes")
+        executor = _get_executor()
+        _pending += 1
+        _metrics["max_pending"] = max(_metrics["max_pending"], _pending)
+    submitted = time.perf_counter()
+
+    def done(future):
+        global _pending
+        latency_ms = (time.perf_counter() - submitted) * 1000
+        with _lock:
+            _pending -= 1
+            if future.cancelled() or future.exception() is not None:
+                _metrics["failed"] += 1
+                return
+            _metrics["completed"] += 1
+            _metrics["latency_total_ms"] += latency_ms
+            _metrics["latency_max_ms"] = max(_metrics["latency_max_ms"], latency_ms)
+            _metrics["run_time_total_ms"] += future.result()[1] * 1000
+
+    try:
+        future = executor.submit(fn, *args)
+    except Exception:
+        with _lock:
+            _pending -= 1
+        raise
+    future.add_done_callback(done)
+    return future
+
+def hash_password(password: str) -> str:
+    return _submit(_hash, password).result()[0]
+
+def verify_password(password: str, hashed: str) -> tuple:
+    """Retorna (válida, hash_nuevo); hash_nuevo no es None si el hash debe rehacerse."""
+    return _submit(_verify_and_update, password, hashed).result()[0]
+
+# Versiones para handlers async: esperan sin bloquear el event loop
+async def hash_password_async(password: str) -> str:
+    return (await asyncio.wrap_future(_submit(_hash, password)))[0]
+
+async def verify_password_async(password: str, hashed: str) -> tuple:
+    return (await asyncio.wrap_future(_submit(_verify_and_update, password, hashed)))[0]
+
+def hashing_metrics() -> dict:
+    with _lock:
+        metrics = dict(_metrics)
+        pending = _pending
+    metrics["workers"] = PASSWORD_HASH_WORKERS
+    metrics["max_queue"] = PASSWORD_HASH_MAX_PENDING
+    metrics["pending"] = pending
+    metrics["queue_depth"] = max(pending - PASSWORD_HASH_WORKERS, 0)
+    completed = metrics["completed"]
+    metrics["latency_avg_ms"] = metrics["latency_total_ms"] / completed if completed else 0.0
+    # Espera en cola = latencia total - tiempo de bcrypt en el proceso hijo
+    metrics["queue_wait_avg_ms"] = (metrics["latency_total_ms"] - metrics["run_time_total_ms"]) / completed if completed else 0.0
+    return metrics
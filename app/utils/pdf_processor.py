@@ -1,26 +1,204 @@
+import os
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
 import pdfplumber
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
+
+# Versión de la lógica de extracción: cambiarla invalida los resultados cacheados
+EXTRACTOR_VERSION = "1"
+
+# Procesos usados para extraer páginas en paralelo (1 = modo secuencial)
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", "1"))
+# Páginas máximas por tarea enviada al pool
+PDF_PAGES_PER_CHUNK = int(os.getenv("PDF_PAGES_PER_CHUNK", "8"))
+
+# Pre-filtro con pdfium: solo las páginas con trazos (líneas/rectángulos)
+# pasan al análisis de pdfplumber
+PDF_PREFILTER = os.getenv("PDF_PREFILTER", "1") == "1"
+# Trazos mínimos para considerar la página candidata. Con la estrategia por
+# defecto ("lines") pdfplumber solo detecta tablas a partir de trazos, así que
+# con 1 el resultado es idéntico al de no filtrar
+PDF_PREFILTER_MIN_PATHS = int(os.getenv("PDF_PREFILTER_MIN_PATHS", "1"))
+# Los trazos pueden estar dentro de Form XObjects anidados; se recorren todos
+# los niveles (pdfium ya limita el anidamiento al interpretar la página)
+_FORM_MAX_DEPTH = float("inf")
+
+# Margen (en puntos) para considerar que una línea queda por encima de la tabla
+TITLE_TOLERANCE = 1
+
+_executor: ProcessPoolExecutor | None = None
+_executor_workers = 0
+
+def extractor_version():
+    # El umbral de trazos del pre-filtro puede cambiar qué tablas se encuentran
+    if PDF_PREFILTER and PDF_PREFILTER_MIN_PATHS > 1:
+        return f"{EXTRACTOR_VERSION}-p{PDF_PREFILTER_MIN_PATHS}"
+    return EXTRACTOR_VERSION
+
+def _extract_page(page, page_number):
+    found = page.find_tables()
+    if not found:
+        return []
+
+    # Título: la línea de texto más cercana por encima del bbox de la tabla.
+    # Las líneas se ordenan por su borde inferior para ubicarla con búsqueda binaria.
+    lines = sorted(page.extract_text_lines(return_chars=False), key=lambda line: line["bottom"])
+    bottoms = [line["bottom"] for line in lines]
+    bboxes = [table.bbox for table in found]
 
-def extract_tables(file_path):
     tables = []
-    with pdfplumber.open(file_path) as pdf:
-        for i, page in enumerate(pdf.pages):
-            text_lines = page.extract_text().split("\n")
-            page_tables = page.extract_tables()
-
-            for table in page_tables:
-                # Buscar título: línea anterior a la primera fila de la tabla
-                first_row = table[0]
-                title = None
-                for line in text_lines:
-                    if all(cell in line for cell in first_row[:2]): 
-                        idx = text_lines.index(line)
-                        if idx > 0:
-                            title = text_lines[idx - 1]
+    for table in found:
+        x0, top, x1, bottom = table.bbox
+        title = None
+        idx = bisect_right(bottoms, top + TITLE_TOLERANCE) - 1
+        if idx >= 0:
+            line = lines[idx]
+            # Si esa línea es texto de otra tabla, esta tabla no tiene título propio
+            if not any(b[1] <= line["top"] and line["bottom"] <= b[3] for b in bboxes):
+                title = line["text"].strip() or None
+
+        tables.append({
+            "page": page_number,
+            "description": title or "Tabla sin título",
+            "data": table.extract()
+        })
+    return tables
+
+def _extract_page_range(file_path, page_numbers):
+    """Extrae las tablas de las páginas indicadas (números base 1)."""
+    tables = []
+    with pdfplumber.open(file_path, pages=page_numbers) as pdf:
+        for page in pdf.pages:
+            tables.extend(_extract_page(page, page.page_number))
+            _release_page(pdf, page)
+    return tables
+
+def _get_executor(workers):
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != workers:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+        _executor = ProcessPoolExecutor(max_workers=workers)
+        _executor_workers = workers
+    return _executor
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+def _page_ranges(page_numbers, workers, chunk_size):
+    # Reparte las páginas para que todos los procesos tengan trabajo, sin
+    # superar chunk_size páginas por tarea
+    size = max(1, min(chunk_size, -(-len(page_numbers) // workers)))
+    return [page_numbers[start:start + size] for start in range(0, len(page_numbers), size)]
+
+def find_candidate_pages(file_path):
+    """
+    Retorna los números de página (base 1) que probablemente contienen tablas.
+
+    Usa pdfium (nativo) para contar trazos, mucho más barato que el análisis
+    de layout de pdfplumber. Con la estrategia "lines" una página sin trazos
+    no puede tener tablas, así que no se descarta ninguna que pdfplumber encontraría.
+    """
+    candidates = []
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        for i in range(len(pdf)):
+            page = pdf[i]
+            try:
+                paths = 0
+                for _ in page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_PATH], max_depth=_FORM_MAX_DEPTH):
+                    paths += 1
+                    if paths >= PDF_PREFILTER_MIN_PATHS:
                         break
+                if paths >= PDF_PREFILTER_MIN_PATHS:
+                    candidates.append(i + 1)
+            finally:
+                page.close()
+    finally:
+        pdf.close()
+    return candidates
+
+def _page_count(file_path):
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+def _release_page(pdf, page):
+    # pdfplumber guarda en cada página los objetos y el layout ya analizados, y
+    # pdfminer cachea los objetos del documento ya resueltos; se liberan para
+    # que la memoria no crezca con el número de páginas
+    page.close()
+    doc = pdf.doc
+    for attr in ("_cached_objs", "_parsed_objs"):
+        cache = getattr(doc, attr, None)
+        if isinstance(cache, dict):
+            cache.clear()
+
+def iter_tables(file_path, on_page=None, workers=None, chunk_size=None, prefilter=None):
+    """
+    Genera las tablas de un PDF una a una, en orden de página.
+
+    Cada página se libera al terminar de procesarla, de modo que la memoria se
+    mantiene estable sin importar el tamaño del documento.
+
+    `on_page(page_number, tables_found)` se llama al terminar cada página (o
+    rango de páginas en modo paralelo), para que el llamador pueda reportar progreso.
+
+    Con `workers` > 1 las páginas se reparten en rangos entre un pool de procesos
+    y los resultados se entregan en orden de página; el resultado es idéntico al
+    del modo secuencial.
+
+    Con `prefilter` (por defecto PDF_PREFILTER) solo se analizan las páginas que
+    `find_candidate_pages` considera candidatas.
+    """
+    workers = PDF_EXTRACT_WORKERS if workers is None else workers
+    chunk_size = chunk_size or PDF_PAGES_PER_CHUNK
+    prefilter = PDF_PREFILTER if prefilter is None else prefilter
+
+    if prefilter:
+        page_numbers = find_candidate_pages(file_path)
+    else:
+        page_numbers = list(range(1, _page_count(file_path) + 1))
+
+    found = 0
+    if workers <= 1 or len(page_numbers) <= 1:
+        with pdfplumber.open(file_path, pages=page_numbers) as pdf:
+            for page in pdf.pages:
+                page_tables = _extract_page(page, page.page_number)
+                _release_page(pdf, page)
+                found += len(page_tables)
+                yield from page_tables
+
+                if on_page:
+                    on_page(page.page_number, found)
+        return
+
+    ranges = _page_ranges(page_numbers, workers, chunk_size)
+    executor = _get_executor(workers)
+    # Solo se mantienen en vuelo unos pocos rangos para no acumular resultados
+    max_in_flight = workers * 2
+    pending = []
+    next_range = 0
+    while next_range < len(ranges) or pending:
+        while next_range < len(ranges) and len(pending) < max_in_flight:
+            pages = ranges[next_range]
+            pending.append((pages[-1], executor.submit(_extract_page_range, file_path, pages)))
+            next_range += 1
+
+        last_page, future = pending.pop(0)
+        range_tables = future.result()
+        found += len(range_tables)
+        yield from range_tables
+
+        if on_page:
+            on_page(last_page, found)
 
-                tables.append({
-                    "page": i + 1,
-                    "description": title or "Tabla sin título",
-                    "data": table
-                })
-    return tables
\ No newline at end of file
+def extract_tables(file_path, on_page=None, workers=None, chunk_size=None, prefilter=None):
+    """Extrae todas las tablas de un PDF en una lista (ver `iter_tables`)."""
+    return list(iter_tables(file_path, on_page=on_page, workers=workers, chunk_size=chunk_size, prefilter=prefilter))
@@ -0,0 +1,108 @@
+"""
+Tokens de restablecimiento de contraseña con formato "selector.verificador".
+
+El selector (público) se guarda tal cual con índice único y ubica la fila en
+una sola consulta; del verificador solo se guarda su SHA-256 en token_hash y
+se compara en tiempo constante. Ambos son aleatorios de alta entropía, así
+que un hash rápido basta (no es una contraseña que se pueda adivinar).
+
+Los tokens emitidos antes de este formato (uuid4 con hash bcrypt, sin
+selector) se siguen aceptando hasta que vencen; ver `_find_legacy`.
+"""
+import hashlib
+import hmac
+import os
+import re
+import secrets
+from datetime import datetime, timedelta
+
+from .db_connection import get_conn
+from .db_operations import execute_query
+from .password_hashing import verify_password
+
+RESET_TOKEN_TTL_MINUTES = int(os.getenv("RESET_TOKEN_TTL_MINUTES", "60"))
+SELECTOR_BYTES = 12
+VERIFIER_BYTES = 32
+RESET_PRUNE_BATCH = 1000
+_LEGACY_TOKEN_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+def _verifier_hash(verifier: str) -> str:
+    return hashlib.sha256(verifier.encode("utf-8")).hexdigest()
+
+def create_reset_token(user_id: int) -> str:
+    """Guarda un token nuevo para el usuario y retorna el valor que se envía por correo."""
+    selector = secrets.token_urlsafe(SELECTOR_BYTES)
+    verifier = secrets.token_urlsafe(VERIFIER_BYTES)
+    expires_at = datetime.now() + timedelta(minutes=RESET_TOKEN_TTL_MINUTES)
+    execute_query(
+        "INSERT INTO password_resets (user_id, selector, token_hash, expires_at) VALUES (%s, %s, %s, %s)",
+        (user_id, selector, _verifier_hash(verifier), expires_at),
+    )
+    return f"{selector}.{verifier}"
+
+def find_reset_token(token: str):
+    """
+    Retorna la fila vigente (id, user_id, expires_at) del token, o None.
+
+    Costo constante: una búsqueda por índice y un SHA-256, sin importar cuántos
+    tokens haya pendientes.
+    """
+    selector, _, verifier = token.partition(".")
+    if not verifier:
+        return _find_legacy(token)
+
+    record = execute_query(
+        "SELECT id, user_id, expires_at, token_hash FROM password_resets WHERE selector = %s LIMIT 1",
+        (selector,), fetch_one=True,
+    )
+    if not record or not hmac.compare_digest(record["token_hash"], _verifier_hash(verifier)):
+        return None
+    if record["expires_at"] < datetime.now():
+        return None
+    return record
+
+def _find_legacy(token: str):
+    # Tokens uuid4 emitidos antes de la migración 10: solo se revisan los que
+    # aún no vencen (como mucho los de la última hora), así que el recorrido
+    # con bcrypt desaparece solo. Quitar una vez pasado RESET_TOKEN_TTL_MINUTES
+    # desde el despliegue.
+    if not _LEGACY_TOKEN_RE.match(token):
+        return None
+    records = execute_query("""
+        SELECT id, user_id, expires_at, token_hash FROM password_resets
+        WHERE selector IS NULL AND expires_at > %s
+    """, (datetime.now(),), fetch_all=True) or []
+    for record in records:
+        if verify_password(token, record["token_hash"])[0]:
+            return record
+    return None
+
+def consume_reset_token(record_id: int) -> bool:
+    """Borra el token usado. False si otra petición ya lo consumió."""
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("DELETE FROM password_resets WHERE id = %s", (record_id,))
+            conn.commit()
+            return cursor.rowcount == 1
+        finally:
+            cursor.close()
+
+def prune_expired() -> int:
+    """Borra de la BD los tokens vencidos, por lotes. Retorna cuántos borró."""
+    total = 0
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        try:
+            while True:
+                cursor.execute(
+                    "DELETE FROM password_resets WHERE expires_at <= %s LIMIT %s",
+                    (datetime.now(), RESET_PRUNE_BATCH),
+                )
+                conn.commit()
+                total += cursor.rowcount
+                if cursor.rowcount < RESET_PRUNE_BATCH:
+                    break
+        finally:
+            cursor.close()
+    return total
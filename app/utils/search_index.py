@@ -0,0 +1,93 @@
+import os
+import re
+import unicodedata
+from collections import Counter
+
+from .db_operations import bulk_insert
+
+TOKEN_RE = re.compile(r"\w+")
+# Separador de miles entre dígitos: "400.000" / "400,000" -> "400000"
+THOUSANDS_RE = re.compile(r"(?<=\d)[.,](?=\d{3}(?!\d))")
+MAX_TERM_LENGTH = 64
+DESCRIPTION_WEIGHT = 5
+CELL_WEIGHT = 1
+# Términos distintos indexados por tabla (los de mayor peso)
+MAX_TERMS_PER_TABLE = int(os.getenv("SEARCH_MAX_TERMS_PER_TABLE", "2000"))
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+def normalize(text: str) -> str:
+    """Minúsculas, sin tildes y sin separadores de miles."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return THOUSANDS_RE.sub("", text)
+
+def tokenize(text: str | None) -> list:
+    if not text:
+        return []
+    return [token[:MAX_TERM_LENGTH] for token in TOKEN_RE.findall(normalize(text))]
+
+def table_terms(description: str | None, data: list) -> dict:
+    """Pesos por término de una tabla: la descripción pesa más que las celdas."""
+    weights = Counter()
+    for token in tokenize(description):
+        weights[token] += DESCRIPTION_WEIGHT
+    for row in data or []:
+        for cell in row:
+            if cell is not None:
+                for token in tokenize(str(cell)):
+                    weights[token] += CELL_WEIGHT
+    return dict(weights.most_common(MAX_TERMS_PER_TABLE))
+
+def index_tables(cursor, document_id: int, department: int | None, table_ids: list, tables: list):
+    """Indexa las tablas recién insertadas (mismo orden en `table_ids` y `tables`)."""
+    rows = []
+    for table_id, table in zip(table_ids, tables):
+        for term, weight in table_terms(table["description"], table["data"]).items():
+            rows.append((term, department or 0, table_id, document_id, min(weight, 65535)))
+    bulk_insert(cursor, "search_terms", ["term", "department", "table_id", "document_id", "weight"], rows)
+
+def remove_document(cursor, document_id: int):
+    cursor.execute("DELETE FROM search_terms WHERE document_id = %s", (document_id,))
+
+def _like_prefix(token: str) -> str:
+    return token.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+def search(cursor, query: str, department: int | None = None, limit: int = SEARCH_DEFAULT_LIMIT,
+           after: list | None = None) -> list:
+    """
+    Busca tablas por los términos de `query` (cada uno como prefijo).
+
+    Ordena por cantidad de términos de la consulta encontrados, luego por peso
+    y luego por id. `after` = (matched, score, table_id) del último resultado
+    de la página anterior. Retorna [(table_id, score, matched), ...] con a lo
+    sumo `limit` resultados.
+    """
+    tokens = list(dict.fromkeys(tokenize(query)))[:10]
+    if not tokens:
+        return []
+    patterns = [_like_prefix(t) for t in tokens]
+
+    matched = " + ".join(["MAX(term LIKE %s)"] * len(patterns))
+    where = " OR ".join(["term LIKE %s"] * len(patterns))
+    params = patterns + patterns
+    if department is not None:
+        where = f"({where}) AND department = %s"
+        params.append(department or 0)
+    having = ""
+    if after:
+        m, score, table_id = after
+        having = "HAVING matched < %s OR (matched = %s AND (score < %s OR (score = %s AND table_id < %s)))"
+        params += [m, m, score, score, table_id]
+    params.append(limit)
+
+    cursor.execute(f"""
+        SELECT table_id, SUM(weight) AS score, ({matched}) AS matched
+        FROM search_terms
+        WHERE {where}
+        GROUP BY table_id
+        {having}
+        ORDER BY matched DESC, score DESC, table_id DESC
+        LIMIT %s
+    """, params)
+    return [(row[0], int(row[1]), int(row[2])) for row in cursor.fetchall()]
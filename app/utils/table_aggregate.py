@@ -0,0 +1,210 @@
+import os
+from itertools import chain
+
+import numpy as np
+
+from .db_operations import fetch_all
+from .table_rows import iter_row_blocks
+from .table_typing import column_key, UNIT_CHARS
+
+# Límites de cada lote al agregar: tablas y filas (lo que se alcance primero;
+# una tabla más grande que AGGREGATE_BATCH_ROWS forma un lote por sí sola)
+AGGREGATE_BATCH_TABLES = int(os.getenv("AGGREGATE_BATCH_TABLES", "200"))
+AGGREGATE_BATCH_ROWS = int(os.getenv("AGGREGATE_BATCH_ROWS", "200000"))
+# Ancho máximo de las celdas que se pasan a NumPy: los arreglos de texto
+# tienen ancho fijo (el de la celda más larga), así que una sola celda de texto
+# largo multiplicaría la memoria del lote. Ninguna cifra válida es tan larga;
+# los nombres de grupo más largos se recortan.
+NUMBER_MAX_CHARS = 64
+GROUP_MAX_CHARS = 64
+_CURRENCY_CODES = ("us$", "usd", "cop", "eur", "mxn")
+NO_GROUP = "total"
+
+def _replace_where(s: np.ndarray, old: str, new: str) -> np.ndarray:
+    # replace solo sobre las celdas que contienen `old` (suelen ser pocas)
+    mask = np.char.find(s, old) >= 0
+    if mask.any():
+        s[mask] = np.char.replace(s[mask], old, new)
+    return s
+
+def _number_text(cell) -> str:
+    text = "" if cell is None else str(cell)
+    return text if len(text) <= NUMBER_MAX_CHARS else ""
+
+def parse_numbers(cells) -> np.ndarray:
+    """
+    Convierte un arreglo de celdas de texto a float64 con operaciones vectorizadas
+    (NaN si la celda no es numérica).
+
+    Sigue las mismas reglas que `table_typing.parse_number`: moneda, %, unidad
+    al final, negativos con '-' o paréntesis, y separadores de miles/decimales
+    ('400.000', '1,234.5', '1.234,5', '0,75'). Las celdas de más de
+    NUMBER_MAX_CHARS caracteres se toman como no numéricas.
+    """
+    s = np.char.strip(np.asarray([_number_text(cell) for cell in cells], dtype=str))
+    negative = np.char.startswith(s, "(")
+    s = np.char.lstrip(s, "($€£ ")
+    negative |= np.char.startswith(s, "-") | np.char.startswith(s, "−")
+    s = np.char.lstrip(s, "-−$€£ ")
+
+    # Códigos de moneda al inicio ("USD 1.000"): solo se revisan las celdas que empiezan con letra
+    lettered = np.char.isalpha(s.astype("U1"))
+    if lettered.any():
+        sub = np.char.lower(s[lettered])
+        for code in _CURRENCY_CODES:
+            starts = np.char.startswith(sub, code)
+            if starts.any():
+                sub[starts] = np.char.replace(sub[starts], code, "", 1)
+        sub = np.char.lstrip(sub, "$ ")
+        negative[lettered] |= np.char.startswith(sub, "-") | np.char.startswith(sub, "−")
+        s[lettered] = np.char.lstrip(sub, "-−")
+
+    s = np.char.rstrip(s, UNIT_CHARS + "%) \u00a0")
+    for sep in (" ", "'", "\u00a0"):
+        s = _replace_where(s, sep, "")
+
+    dots, commas = np.char.count(s, "."), np.char.count(s, ",")
+    last_dot, last_comma = np.char.rfind(s, "."), np.char.rfind(s, ",")
+    length = np.char.str_len(s)
+    both = (dots > 0) & (commas > 0)
+    # Con un solo tipo de separador: es de miles si se repite o si le siguen 3 dígitos
+    thousands = (dots + commas > 1) | (length - np.maximum(last_dot, last_comma) - 1 == 3)
+    comma_decimal = (both & (last_comma > last_dot)) | ((commas > 0) & (dots == 0) & ~thousands)
+    remove_dots = comma_decimal | ((dots > 0) & (commas == 0) & thousands)
+
+    if remove_dots.any():
+        s[remove_dots] = np.char.replace(s[remove_dots], ".", "")
+    if comma_decimal.any():
+        s[comma_decimal] = np.char.replace(s[comma_decimal], ",", ".")
+    s = _replace_where(s, ",", "")
+
+    # Válido: solo dígitos con a lo sumo un punto decimal
+    point = np.char.count(s, ".") == 1
+    digits = s.copy()
+    if point.any():
+        digits[point] = np.char.replace(s[point], ".", "", 1)
+    valid = (length > 0) & (np.char.count(s, ".") <= 1) & np.char.isdigit(digits)
+    values = np.full(s.shape, np.nan)
+    values[valid] = s[valid].astype(np.float64)
+    values[negative] *= -1
+    return values
+
+def aggregate(values: np.ndarray, groups: np.ndarray) -> dict:
+    """count/sum/min/max por grupo, ignorando los valores NaN."""
+    keep = ~np.isnan(values)
+    values, groups = values[keep], groups[keep]
+    if not len(values):
+        return {}
+
+    keys, inverse = np.unique(groups, return_inverse=True)
+    counts = np.bincount(inverse)
+    sums = np.bincount(inverse, weights=values)
+    order = np.argsort(inverse, kind="stable")
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    mins = np.minimum.reduceat(values[order], starts)
+    maxs = np.maximum.reduceat(values[order], starts)
+    return {
+        str(key): {"count": int(c), "sum": float(t), "min": float(lo), "max": float(hi)}
+        for key, c, t, lo, hi in zip(keys, counts, sums, mins, maxs)
+    }
+
+def merge(total: dict, partial: dict):
+    for key, agg in partial.items():
+        current = total.get(key)
+        if current is None:
+            total[key] = dict(agg)
+            continue
+        current["count"] += agg["count"]
+        current["sum"] += agg["sum"]
+        current["min"] = min(current["min"], agg["min"])
+        current["max"] = max(current["max"], agg["max"])
+
+def _cell(row: list, index: int):
+    return row[index] if index < len(row) and row[index] is not None else ""
+
+def _batches(tables: list, batch_tables: int, batch_rows: int):
+    """Agrupa `tables` ({"table_id", "row_count", ...}) en lotes acotados por tablas y por filas."""
+    batch, rows = [], 0
+    for table in tables:
+        if batch and (len(batch) >= batch_tables or rows + table["row_count"] > batch_rows):
+            yield batch
+            batch, rows = [], 0
+        batch.append(table)
+        rows += table["row_count"]
+    if batch:
+        yield batch
+
+def _load_batch(table_ids: list, value_indexes: dict, group_by: str | None):
+    """
+    Lee un lote de tablas y retorna (celdas de valores, celdas de grupo) concatenadas.
+
+    Cada tabla se recorre por bloques y de cada fila solo se guardan la celda
+    del valor y la del grupo, así que la memoria depende de las filas del lote
+    y no del ancho de las tablas.
+    """
+    placeholders = ", ".join(["%s"] * len(table_ids))
+    tables = fetch_all(f"""
+        SELECT id, table_format, table_blob, table_data, chunk_rows
+        FROM extracted_tables
+        WHERE id IN ({placeholders})
+    """, tuple(table_ids))
+
+    value_cells, group_cells = [], []
+    wanted = column_key(group_by) if group_by else None
+    for table in tables:
+        blocks = iter_row_blocks(table)
+        rows = next(blocks, None)
+        if not rows:
+            continue
+        value_index, group_index = value_indexes[table["id"]], None
+        if wanted is not None:
+            header = [column_key(name) for name in rows[0]]
+            if wanted not in header:
+                continue
+            group_index = header.index(wanted)
+        for rows in chain([rows[1:]], blocks):
+            value_cells.extend(_number_text(_cell(row, value_index)) for row in rows)
+            if group_index is None:
+                group_cells.extend([NO_GROUP] * len(rows))
+            else:
+                group_cells.extend(str(_cell(row, group_index)).strip()[:GROUP_MAX_CHARS] for row in rows)
+    return value_cells, group_cells
+
+def aggregate_column(column: str, group_by: str | None = None, department: int | None = None,
+                     batch_tables: int | None = None, batch_rows: int | None = None) -> tuple:
+    """
+    Agrega la columna numérica `column` de todas las tablas que la tienen,
+    agrupando por los valores de la columna `group_by` de cada tabla.
+
+    Las tablas se ubican con el índice de table_numeric_values y se cargan por
+    lotes de como mucho `batch_tables` tablas y `batch_rows` filas; cada lote
+    se convierte a arreglos NumPy.
+    Retorna (grupos, tablas_usadas).
+    """
+    batch_tables = batch_tables or AGGREGATE_BATCH_TABLES
+    batch_rows = batch_rows or AGGREGATE_BATCH_ROWS
+    where, params = "v.column_key = %s", [column_key(column)]
+    if department is not None:
+        where, params = "v.department = %s AND " + where, [department or 0] + params
+    matches = fetch_all(f"""
+        SELECT DISTINCT v.table_id, v.column_index, t.row_count
+        FROM table_numeric_values v
+        JOIN extracted_tables t ON t.id = v.table_id
+        WHERE {where}
+    """, tuple(params))
+
+    value_indexes, tables = {}, []
+    for m in sorted(matches, key=lambda m: (m["table_id"], m["column_index"])):
+        if m["table_id"] not in value_indexes:
+            value_indexes[m["table_id"]] = m["column_index"]
+            tables.append({"table_id": m["table_id"], "row_count": m["row_count"] or 0})
+
+    totals = {}
+    for batch in _batches(tables, batch_tables, batch_rows):
+        value_cells, group_cells = _load_batch([t["table_id"] for t in batch], value_indexes, group_by)
+        if value_cells:
+            merge(totals, aggregate(parse_numbers(value_cells), np.asarray(group_cells, dtype=str)))
+
+    for agg in totals.values():
+        agg["avg"] = agg["sum"] / agg["count"]
+    return totals, len(tables)
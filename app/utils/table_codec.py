@@ -0,0 +1,62 @@
+import json
+import os
+import zlib
+
+# Formatos de extracted_tables:
+#   0 = legado: JSON en la columna TEXT table_data
+#   1 = JSON compacto comprimido con zlib en la columna LONGBLOB table_blob
+#   2 = filas repartidas en bloques de chunk_rows filas en extracted_table_chunks,
+#       cada bloque con el mismo formato que 1 (tablas de más de TABLE_CHUNK_ROWS filas)
+FORMAT_JSON_TEXT = 0
+FORMAT_ZLIB_JSON = 1
+FORMAT_CHUNKED = 2
+CURRENT_FORMAT = FORMAT_ZLIB_JSON
+
+TABLE_COMPRESS_LEVEL = int(os.getenv("TABLE_COMPRESS_LEVEL", "6"))
+# Filas por bloque; las tablas más grandes se guardan en bloques
+TABLE_CHUNK_ROWS = int(os.getenv("TABLE_CHUNK_ROWS", "1000"))
+
+def encode_table(data: list) -> tuple:
+    """Retorna (table_format, table_blob) para guardar las filas de una tabla."""
+    raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return CURRENT_FORMAT, zlib.compress(raw, TABLE_COMPRESS_LEVEL)
+
+def encode_chunks(data: list, chunk_rows: int | None = None) -> list:
+    """Parte las filas en bloques de `chunk_rows` y retorna el blob de cada bloque."""
+    chunk_rows = chunk_rows or TABLE_CHUNK_ROWS
+    return [encode_table(data[start:start + chunk_rows])[1] for start in range(0, len(data), chunk_rows)]
+
+def decode_chunk(chunk_blob: bytes) -> list:
+    return decode_table(FORMAT_ZLIB_JSON, chunk_blob)
+
+def chunk_items_json(chunk_blob: bytes) -> bytes:
+    """JSON de las filas de un bloque sin los corchetes, para concatenar bloques."""
+    return zlib.decompress(chunk_blob)[1:-1]
+
+def table_json(table_format: int, table_blob: bytes | None, table_data: str | None = None) -> bytes:
+    """JSON de las filas tal como está guardado, sin convertirlo a objetos Python."""
+    if table_format == FORMAT_ZLIB_JSON:
+        return zlib.decompress(table_blob)
+    if table_format == FORMAT_JSON_TEXT:
+        return (table_data or "[]").encode("utf-8")
+    if table_format == FORMAT_CHUNKED:
+        raise ValueError("Las tablas en bloques se leen desde extracted_table_chunks")
+    raise ValueError(f"Formato de tabla desconocido: {table_format}")
+
+def decode_table(table_format: int, table_blob: bytes | None, table_data: str | None = None) -> list:
+    return json.loads(table_json(table_format, table_blob, table_data))
+
+def iter_table_json(table_format: int, table_blob: bytes | None, table_data: str | None = None,
+                    chunk_size: int = 64 * 1024):
+    """Como `table_json`, pero entrega el JSON en trozos de hasta `chunk_size` bytes."""
+    if table_format == FORMAT_ZLIB_JSON:
+        decompressor = zlib.decompressobj()
+        data = table_blob
+        while data:
+            yield decompressor.decompress(data, chunk_size)
+            data = decompressor.unconsumed_tail
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+    else:
+        yield table_json(table_format, table_blob, table_data)
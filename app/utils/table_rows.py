@@ -0,0 +1,73 @@
+from .db_operations import fetch_all
+from .table_codec import decode_table, decode_chunk, FORMAT_CHUNKED
+
+def read_rows(table: dict, offset: int, limit: int) -> list:
+    """
+    Lee las filas [offset, offset + limit) de una tabla de extracted_tables.
+
+    `table` es la fila de la tabla (table_format, table_blob, table_data,
+    chunk_rows). En formato 2 solo se leen y descomprimen los bloques que
+    cubren el rango pedido; en los demás formatos se decodifica la tabla entera
+    (que por construcción tiene como mucho TABLE_CHUNK_ROWS filas).
+    """
+    if table["table_format"] != FORMAT_CHUNKED:
+        data = decode_table(table["table_format"], table["table_blob"], table["table_data"])
+        return data[offset:offset + limit]
+
+    chunk_rows = table["chunk_rows"]
+    first, last = offset // chunk_rows, (offset + limit - 1) // chunk_rows
+    chunks = fetch_all("""
+        SELECT chunk_index, chunk_blob
+        FROM extracted_table_chunks
+        WHERE table_id = %s AND chunk_index BETWEEN %s AND %s
+        ORDER BY chunk_index
+    """, (table["id"], first, last))
+
+    rows = []
+    for chunk in chunks:
+        rows.extend(decode_chunk(chunk["chunk_blob"]))
+    start = offset - first * chunk_rows
+    return rows[start:start + limit]
+
+def iter_row_blocks(table: dict):
+    """
+    Recorre todas las filas de una tabla por bloques, sin tenerla entera en memoria.
+
+    En formato 2 se descomprime un bloque de extracted_table_chunks a la vez;
+    en los demás formatos la tabla es un único bloque.
+    """
+    if table["table_format"] != FORMAT_CHUNKED:
+        yield decode_table(table["table_format"], table["table_blob"], table["table_data"])
+        return
+
+    chunks = fetch_all("""
+        SELECT chunk_blob
+        FROM extracted_table_chunks
+        WHERE table_id = %s
+        ORDER BY chunk_index
+    """, (table["id"],))
+    for chunk in chunks:
+        yield decode_chunk(chunk["chunk_blob"])
+
+def project(rows: list, indexes: list) -> list:
+    """Deja en cada fila solo las columnas `indexes` (None si la fila es más corta)."""
+    return [[row[i] if i < len(row) else None for i in indexes] for row in rows]
+
+def column_indexes(header: list, columns: list) -> list:
+    """
+    Convierte columnas pedidas por nombre del encabezado o por posición en índices.
+
+    Primero se busca el nombre en el encabezado (un encabezado puede ser un
+    número, como el año "2020"); solo si no coincide se toma como posición.
+    Lanza ValueError si no es ninguna de las dos.
+    """
+    names = ["" if cell is None else str(cell) for cell in header]
+    indexes = []
+    for column in columns:
+        if column in names:
+            indexes.append(names.index(column))
+        elif column.isdigit():
+            indexes.append(int(column))
+        else:
+            raise ValueError(f"Columna no encontrada: {column}")
+    return indexes
@@ -0,0 +1,158 @@
+import json
+import os
+import time
+from contextlib import ExitStack
+
+import anyio
+from fastapi.responses import StreamingResponse
+
+from .db_connection import get_conn, discard_connection
+from .table_codec import iter_table_json, chunk_items_json, FORMAT_CHUNKED
+
+# Bytes acumulados antes de entregar un trozo de la respuesta
+STREAM_CHUNK_BYTES = int(os.getenv("STREAM_CHUNK_BYTES", str(64 * 1024)))
+# Tiempo máximo que una respuesta en streaming retiene su conexión del pool;
+# si el cliente lee más lento la respuesta se corta
+STREAM_MAX_SECONDS = float(os.getenv("STREAM_MAX_SECONDS", "300"))
+STORAGE_COLUMNS = ("table_format", "table_blob", "table_data")
+
+def stream_tables(query: str, params: tuple, head: dict, key: str, extra=None, headers: dict | None = None):
+    """
+    Respuesta JSON `{**head, key: [tabla, ...]}` leída en streaming desde la BD.
+
+    La conexión se toma y la consulta se ejecuta aquí, antes de crear la
+    respuesta: si el pool está agotado o la consulta falla, la excepción llega
+    a los manejadores de la app (503, 500) en lugar de un 200 truncado. Solo
+    la lectura de las filas queda para cuando se envía el cuerpo.
+
+    Las filas de `query` (con id, table_format, table_blob, table_data,
+    chunk_blob y las columnas de metadatos a devolver) se leen una a una con
+    un cursor sin buffer; ver `iter_tables_json`.
+    """
+    stack = ExitStack()
+    try:
+        conn = stack.enter_context(get_conn(readonly=True))
+        cursor = conn.cursor(dictionary=True)
+        stack.callback(cursor.close)
+        cursor.execute(query, params)
+    except BaseException:
+        stack.close()
+        raise
+    return TableStreamResponse(_QueryStream(iter_tables_json(cursor, head, key, extra), conn, stack), headers=headers)
+
+class _QueryStream:
+    """
+    Iterador sobre el cuerpo que libera la conexión al terminar o al cerrarse,
+    aunque no se haya empezado a leer. Si quedan filas sin leer (cliente
+    desconectado o lento) la conexión se descarta en lugar de consumirlas.
+    """
+
+    def __init__(self, body, conn, stack: ExitStack):
+        self._body = body
+        self._conn = conn
+        self._stack = stack
+        self._complete = False
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._body)
+        except StopIteration:
+            self._complete = True
+            self.close()
+            raise
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._body.close()
+        if not self._complete:
+            discard_connection(self._conn)
+        try:
+            self._stack.close()
+        except Exception:
+            pass
+
+def iter_tables_json(rows, head: dict, key: str, extra=None):
+    """
+    Genera el JSON `{**head, key: [tabla, ...]}` a partir de las filas de la consulta.
+
+    El JSON guardado de cada tabla se copia a la salida sin convertirlo a
+    objetos Python, así que la memoria usada no depende del tamaño del
+    documento. `extra(fila)` puede agregar campos a cada tabla.
+
+    Las tablas en bloques (formato 2) llegan como una fila por bloque (LEFT
+    JOIN con extracted_table_chunks ordenado por chunk_index), consecutivas.
+    """
+    buffer = bytearray(json.dumps({**head, key: []})[:-2].encode("utf-8"))
+    current_id = None
+    chunked = False
+    first_chunk = True
+    for row in rows:
+        chunk_blob = row.pop("chunk_blob")
+        table_format, table_blob, table_data = (row.pop(c) for c in STORAGE_COLUMNS)
+
+        if row["id"] != current_id:
+            if current_id is not None:
+                buffer += b"]}" if chunked else b"}"
+                buffer += b","
+            current_id = row["id"]
+            if extra:
+                row.update(extra(row))
+            buffer += json.dumps(row, default=str)[:-1].encode("utf-8") + b', "table_data": '
+            chunked = table_format == FORMAT_CHUNKED
+            first_chunk = True
+            if chunked:
+                buffer += b"["
+            else:
+                for part in iter_table_json(table_format, table_blob, table_data, STREAM_CHUNK_BYTES):
+                    buffer += part
+                    if len(buffer) >= STREAM_CHUNK_BYTES:
+                        yield bytes(buffer)
+                        buffer.clear()
+
+        if chunked and chunk_blob is not None:
+            if not first_chunk:
+                buffer += b","
+            buffer += chunk_items_json(chunk_blob)
+            first_chunk = False
+
+        if len(buffer) >= STREAM_CHUNK_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+
+    if current_id is not None:
+        buffer += b"]}" if chunked else b"}"
+    buffer += b"]}"
+    yield bytes(buffer)
+
+class TableStreamResponse(StreamingResponse):
+    """
+    StreamingResponse que corta el envío pasados STREAM_MAX_SECONDS y siempre
+    cierra el contenido, para que la conexión de la BD vuelva al pool aunque
+    el cliente deje de leer.
+    """
+
+    def __init__(self, content, headers: dict | None = None, max_seconds: float | None = None):
+        super().__init__(content, media_type="application/json", headers=headers)
+        self._content = content
+        self._max_seconds = max_seconds or STREAM_MAX_SECONDS
+
+    async def stream_response(self, send):
+        deadline = time.monotonic() + self._max_seconds
+
+        async def send_before_deadline(message):
+            with anyio.fail_after(max(deadline - time.monotonic(), 0)):
+                await send(message)
+
+        try:
+            await super().stream_response(send_before_deadline)
+        except TimeoutError:
+            print(f"⚠️ Respuesta en streaming cortada tras {self._max_seconds}s: el cliente lee demasiado lento")
+            raise
+        finally:
+            self._content.close()
@@ -0,0 +1,127 @@
+import math
+import os
+import re
+from collections import Counter
+
+from .db_operations import bulk_insert
+from .search_index import normalize
+
+KIND_NUMBER = "number"
+KIND_CURRENCY = "currency"
+KIND_PERCENT = "percent"
+
+# Fracción mínima de celdas no vacías (sin contar el encabezado) que deben ser
+# numéricas para tipar la columna
+TYPING_MIN_RATIO = float(os.getenv("TYPING_MIN_RATIO", "0.8"))
+MAX_COLUMN_KEY_LENGTH = 100
+
+# Caracteres de una unidad al final ("95 mg/dL", "12 años"); sin dígitos, para
+# que "1e5" o "5 m3" no se lean como número más unidad. table_aggregate usa la
+# misma lista en su versión vectorizada.
+UNIT_CHARS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZáéíóúüñÁÉÍÓÚÜÑ/°µ"
+
+# Símbolo de moneda opcional, signo, número con separadores (se admite un
+# separador al inicio o al final: ".5", "3."), % opcional y una unidad opcional
+NUMBER_RE = re.compile(rf"""
+    ^\s*
+    (?P<neg1>[-−(])?\s*
+    (?P<currency>[$€£]|us\$|usd|cop|eur|mxn)?\s*
+    (?P<neg2>[-−])?\s*
+    (?P<number>\d[\d.,' ]*\d[.,]?|\d[.,]?|[.,]\d+)
+    \s*(?P<percent>%)?
+    \s*(?P<unit>[{re.escape(UNIT_CHARS)}]+)?
+    \s*\)?\s*$
+""", re.VERBOSE | re.IGNORECASE)
+
+def _to_float(number: str) -> float:
+    """Interpreta separadores de miles y decimales: '400.000', '1,234.5', '1.234,5', '0,75'."""
+    number = number.replace(" ", "").replace("'", "")
+    dots, commas = number.count("."), number.count(",")
+    if dots and commas:
+        decimal = "." if number.rfind(".") > number.rfind(",") else ","
+    elif dots + commas == 0:
+        return float(number)
+    else:
+        sep = "." if dots else ","
+        # Un único separador seguido de exactamente 3 dígitos es de miles (igual
+        # que en la búsqueda); varios separadores también
+        if dots + commas > 1 or len(number) - number.rfind(sep) - 1 == 3:
+            return float(number.replace(sep, ""))
+        decimal = sep
+    thousands = "," if decimal == "." else "."
+    return float(number.replace(thousands, "").replace(decimal, "."))
+
+def parse_number(cell) -> tuple | None:
+    """Retorna (valor, tipo) si la celda es numérica, o None."""
+    if cell is None:
+        return None
+    match = NUMBER_RE.match(str(cell))
+    if not match:
+        return None
+    try:
+        value = _to_float(match["number"])
+    except ValueError:
+        return None
+    if not math.isfinite(value):
+        return None
+    if match["neg1"] or match["neg2"]:
+        value = -value
+    if match["percent"]:
+        return value, KIND_PERCENT
+    if match["currency"]:
+        return value, KIND_CURRENCY
+    return value, KIND_NUMBER
+
+def column_key(name) -> str:
+    """Nombre de columna normalizado para buscarla ('Total Costos  Directos' -> 'total costos directos')."""
+    return " ".join(normalize(str(name or "")).split())[:MAX_COLUMN_KEY_LENGTH]
+
+def type_columns(data: list, min_ratio: float | None = None) -> list:
+    """
+    Detecta las columnas numéricas de una tabla (la fila 0 es el encabezado).
+
+    Retorna [{"index", "name", "key", "kind", "values": [(fila, valor), ...]}, ...]
+    con las columnas en las que al menos `min_ratio` de las celdas no vacías
+    son números, montos o porcentajes.
+    """
+    min_ratio = TYPING_MIN_RATIO if min_ratio is None else min_ratio
+    if len(data) < 2:
+        return []
+    header = data[0]
+    width = max(len(row) for row in data)
+
+    columns = []
+    for index in range(width):
+        values, kinds, filled = [], Counter(), 0
+        for row_index in range(1, len(data)):
+            row = data[row_index]
+            cell = row[index] if index < len(row) else None
+            if cell is None or not str(cell).strip():
+                continue
+            filled += 1
+            parsed = parse_number(cell)
+            if parsed:
+                values.append((row_index, parsed[0]))
+                kinds[parsed[1]] += 1
+        if values and len(values) >= filled * min_ratio:
+            name = header[index] if index < len(header) else None
+            columns.append({
+                "index": index,
+                "name": name,
+                "key": column_key(name),
+                "kind": kinds.most_common(1)[0][0],
+                "values": values,
+            })
+    return columns
+
+def index_numeric_columns(cursor, document_id: int, department: int | None, table_ids: list, tables: list):
+    """Guarda los valores de las columnas numéricas de las tablas recién insertadas."""
+    rows = []
+    for table_id, table in zip(table_ids, tables):
+        for column in type_columns(table["data"]):
+            for row_index, value in column["values"]:
+                rows.append((table_id, column["index"], row_index, document_id, department or 0,
+                             column["key"], column["kind"], value))
+    bulk_insert(cursor, "table_numeric_values",
+                ["table_id", "column_index", "row_index", "document_id", "department", "column_key", "kind", "value"],
+                rows)
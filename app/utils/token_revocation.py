@@ -0,0 +1,133 @@
+"""
+Tokens revocados (logout), compartidos entre procesos.
+
+La tabla revoked_tokens es la fuente de verdad: cada fila guarda el SHA-256
+del token y su `exp`. Cada proceso mantiene una copia en memoria para
+responder `is_revoked` sin ir a la BD, y la actualiza leyendo solo las filas
+nuevas (id mayor al último visto) cada REVOCATION_SYNC_INTERVAL segundos.
+Las entradas se descartan al llegar a su `exp`: a partir de ahí el propio JWT
+ya no es válido.
+"""
+import hashlib
+import os
+import threading
+import time
+
+from .db_connection import get_conn
+from .db_operations import execute
+
+REVOCATION_SYNC_INTERVAL = float(os.getenv("REVOCATION_SYNC_INTERVAL", "2"))
+# Filas leídas por consulta al sincronizar (la carga inicial se hace por lotes)
+REVOCATION_SYNC_BATCH = int(os.getenv("REVOCATION_SYNC_BATCH", "5000"))
+# Ids por debajo del último visto que se vuelven a leer: un INSERT con id menor
+# puede confirmarse después de uno con id mayor
+REVOCATION_SYNC_OVERLAP = 100
+REVOCATION_PRUNE_BATCH = 1000
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+class RevocationStore:
+    def __init__(self):
+        self._expiry: dict = {}
+        self._last_id = 0
+        self._next_sync = 0.0
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+    def revoke(self, token: str, expires_at: int):
+        """
+        Revoca `token` hasta `expires_at` (epoch). El llamador ya verificó el
+        token y acotó `expires_at`; ver userControllers.revoke_token.
+        """
+        if expires_at <= time.time():
+            return
+        key = token_key(token)
+        execute("""
+            INSERT INTO revoked_tokens (token_hash, expires_at) VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE expires_at = VALUES(expires_at)
+        """, (key, expires_at))
+        with self._lock:
+            self._expiry[key] = expires_at
+
+    def is_revoked(self, token: str) -> bool:
+        self._maybe_sync()
+        with self._lock:
+            expires_at = self._expiry.get(token_key(token))
+        return expires_at is not None and expires_at > time.time()
+
+    def _maybe_sync(self):
+        if time.monotonic() < self._next_sync:
+            return
+        # Solo un hilo sincroniza; el resto responde con lo que ya hay en memoria
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            self.sync()
+        except Exception as e:
+            print("⚠️ No se pudo sincronizar los tokens revocados:", e)
+        finally:
+            self._next_sync = time.monotonic() + REVOCATION_SYNC_INTERVAL
+            self._sync_lock.release()
+
+    def sync(self) -> int:
+        """Carga las revocaciones nuevas y descarta las vencidas. Retorna las filas leídas."""
+        now = int(time.time())
+        loaded = 0
+        # Primario: una réplica atrasada dejaría pasar un token recién revocado
+        with get_conn() as conn:
+            cursor = conn.cursor()
+            try:
+                after = max(self._last_id - REVOCATION_SYNC_OVERLAP, 0)
+                while True:
+                    cursor.execute("""
+                        SELECT id, token_hash, expires_at
+                        FROM revoked_tokens
+                        WHERE id > %s AND expires_at > %s
+                        ORDER BY id
+                        LIMIT %s
+                    """, (after, now, REVOCATION_SYNC_BATCH))
+                    rows = cursor.fetchall()
+                    if not rows:
+                        break
+                    with self._lock:
+                        for _, key, expires_at in rows:
+                            self._expiry[key] = expires_at
+                        self._last_id = max(self._last_id, rows[-1][0])
+                    loaded += len(rows)
+                    after = rows[-1][0]
+                    if len(rows) < REVOCATION_SYNC_BATCH:
+                        break
+            finally:
+                cursor.close()
+
+        with self._lock:
+            expired = [key for key, expires_at in self._expiry.items() if expires_at <= now]
+            for key in expired:
+                del self._expiry[key]
+        return loaded
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._expiry), "last_id": self._last_id}
+
+def prune_expired() -> int:
+    """Borra de la BD las revocaciones vencidas, por lotes. Retorna cuántas borró."""
+    total = 0
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        try:
+            while True:
+                cursor.execute(
+                    "DELETE FROM revoked_tokens WHERE expires_at <= %s LIMIT %s",
+                    (int(time.time()), REVOCATION_PRUNE_BATCH),
+                )
+                conn.commit()
+                total += cursor.rowcount
+                if cursor.rowcount < REVOCATION_PRUNE_BATCH:
+                    break
+        finally:
+            cursor.close()
+    return total
+
+revocation_store = RevocationStore()
@@ -0,0 +1,192 @@
+"""
+Worker de extracción de tablas.
+
+Ejecutar con:  python -m app.worker
+Se pueden levantar tantos procesos como se quiera; cada uno reclama trabajos
+de la tabla extraction_jobs sin bloquear a los demás.
+"""
+import json
+import os
+import socket
+import time
+import traceback
+
+from app.utils.db_connection import get_conn, close_pool
+from app.utils.db_operations import fetch_one, fetch_all, insert_extracted_tables
+from app.utils.file_utils import sweep_blobs
+from app.utils.extraction_cache import get_cached_tables, store_tables, EXTRACTION_CACHE_MAX_ENTRY_BYTES
+from app.utils.pdf_processor import iter_tables, shutdown_executor
+from app.utils.search_index import index_tables, remove_document
+from app.utils.table_typing import index_numeric_columns
+from app.utils.token_revocation import prune_expired as prune_revoked_tokens
+from app.utils.reset_tokens import prune_expired as prune_reset_tokens
+from app.utils import job_queue
+
+POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "2"))
+PROGRESS_INTERVAL = float(os.getenv("WORKER_PROGRESS_INTERVAL", "5"))
+# Tablas acumuladas antes de enviarlas a la BD durante la extracción
+TABLE_BATCH_SIZE = int(os.getenv("TABLE_BATCH_SIZE", "50"))
+# Cada cuánto se borran las filas vencidas (tokens revocados y de restablecimiento)
+# y los PDFs que ya no usa ningún documento
+SWEEP_INTERVAL = float(os.getenv("WORKER_SWEEP_INTERVAL", "300"))
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+def _remove_previous_tables(document_id: int):
+    """
+    Borra las tablas de un intento anterior (o de un reproceso), en su propia
+    transacción. Si no hay ninguna, no se ejecuta el DELETE: sobre un índice sin
+    filas para ese documento tomaría bloqueos de hueco que frenarían las
+    inserciones de otros workers.
+    """
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        try:
+            # Lectura consistente en el primario (sin bloqueos): una réplica
+            # atrasada podría no ver las tablas del intento anterior
+            cursor.execute("SELECT 1 FROM extracted_tables WHERE document_id = %s LIMIT 1", (document_id,))
+            if cursor.fetchone() is None:
+                conn.rollback()
+                return
+            remove_document(cursor, document_id)
+            cursor.execute("DELETE FROM extracted_tables WHERE document_id = %s", (document_id,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+def process_job(job: dict) -> int:
+    """
+    Extrae las tablas del PDF del trabajo y las guarda asociadas al documento.
+
+    Si el mismo contenido ya se extrajo antes (misma versión del extractor), las
+    tablas se copian desde la caché sin volver a analizar el PDF. Si no, se
+    consumen del generador de extracción y se guardan por lotes a medida que
+    llegan, así la memoria no depende del tamaño del documento. Cada lote se
+    confirma por separado junto con su índice de búsqueda y sus columnas
+    numéricas; un reintento empieza borrando lo guardado por el anterior.
+    """
+    last_report = [0.0]
+    found = 0
+
+    def report(tables_found, force=False):
+        # El progreso también sirve de heartbeat; se limita para no saturar la BD
+        now = time.monotonic()
+        if force or now - last_report[0] >= PROGRESS_INTERVAL:
+            last_report[0] = now
+            job_queue.update_progress(job["id"], tables_found)
+
+    document = fetch_one("SELECT blob_key, department FROM documents WHERE id = %s", (job["document_id"],))
+    department = document["department"] if document else None
+    content_hash = document["blob_key"] if document else None
+    cached = get_cached_tables(content_hash) if content_hash else None
+
+    # Copia del resultado para la caché, mientras no supere el tamaño máximo por entrada
+    to_cache = [] if content_hash and cached is None else None
+    cache_bytes = 0
+
+    _remove_previous_tables(job["document_id"])
+
+    def flush(batch):
+        # Cada lote en su propia transacción corta: no se retienen bloqueos ni
+        # conexiones mientras se analiza el PDF
+        if not batch:
+            return 0
+        with get_conn() as conn:
+            cursor = conn.cursor()
+            try:
+                ids = insert_extracted_tables(job["document_id"], batch, cursor=cursor)
+                index_tables(cursor, job["document_id"], department, ids, batch)
+                index_numeric_columns(cursor, job["document_id"], department, ids, batch)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+        return len(ids)
+
+    tables = cached if cached is not None else iter_tables(job["file_path"], on_page=lambda page, _: report(found))
+    batch = []
+    for table in tables:
+        batch.append(table)
+        if to_cache is not None:
+            cache_bytes += len(json.dumps(table["data"]))
+            if cache_bytes <= EXTRACTION_CACHE_MAX_ENTRY_BYTES:
+                to_cache.append(table)
+            else:
+                to_cache = None
+        if len(batch) >= TABLE_BATCH_SIZE:
+            found += flush(batch)
+            batch = []
+            report(found, force=True)
+    found += flush(batch)
+
+    if to_cache is not None:
+        try:
+            store_tables(content_hash, to_cache)
+        except Exception as e:
+            print("⚠️ No se pudo guardar el resultado en la caché:", e)
+
+    return found
+
+def run_once() -> bool:
+    """Procesa un trabajo si hay alguno en cola. Retorna True si procesó algo."""
+    job = job_queue.claim_next_job(WORKER_ID)
+    if not job:
+        return False
+
+    print(f"⚙️ [{WORKER_ID}] Procesando trabajo {job['id']} (documento {job['document_id']})")
+    try:
+        found = process_job(job)
+    except Exception as e:
+        status = job_queue.fail_job(job["id"], f"{e}\n{traceback.format_exc()}", job["attempts"])
+        print(f"❌ [{WORKER_ID}] Trabajo {job['id']} falló ({status}):", e)
+    else:
+        job_queue.complete_job(job["id"], found)
+        print(f"✅ [{WORKER_ID}] Trabajo {job['id']} terminado: {found} tablas")
+    return True
+
+def _referenced_blobs(keys: list) -> set:
+    placeholders = ", ".join(["%s"] * len(keys))
+    rows = fetch_all(f"SELECT DISTINCT blob_key FROM documents WHERE blob_key IN ({placeholders})", tuple(keys))
+    return {row["blob_key"] for row in rows}
+
+def sweep():
+    """Limpieza periódica de filas vencidas y PDFs que ya no sirven a la API."""
+    pruned = prune_revoked_tokens()
+    if pruned:
+        print(f"🧹 {pruned} tokens revocados vencidos eliminados")
+    pruned = prune_reset_tokens()
+    if pruned:
+        print(f"🧹 {pruned} tokens de restablecimiento vencidos eliminados")
+    removed = sweep_blobs(_referenced_blobs)
+    if removed:
+        print(f"🧹 {removed} PDFs sin documentos eliminados")
+
+def main():
+    print(f"🚀 Worker {WORKER_ID} iniciado")
+    next_sweep = 0.0
+    try:
+        while True:
+            try:
+                if time.monotonic() >= next_sweep:
+                    next_sweep = time.monotonic() + SWEEP_INTERVAL
+                    sweep()
+                requeued = job_queue.requeue_stale_jobs()
+                if requeued:
+                    print(f"♻️ {requeued} trabajos huérfanos devueltos a la cola")
+                while run_once():
+                    pass
+            except Exception as e:
+                print("⚠️ Error en el ciclo del worker:", e)
+            time.sleep(POLL_INTERVAL)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown_executor()
+        close_pool()
+
+if __name__ == "__main__":
+    main()
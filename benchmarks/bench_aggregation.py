@@ -0,0 +1,75 @@
+"""
+Benchmark de agregación: bucle Python celda por celda vs NumPy vectorizado.
+
+Agrega "Total Costos Directos" por año sobre tablas sintéticas, como hace
+`/api/documents/aggregate`, sin BD (solo el costo de convertir y agregar).
+
+Uso:  python -m benchmarks.bench_aggregation [--tables 2000] [--rows 50] [--batch-tables 200]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.utils.table_aggregate import parse_numbers, aggregate, merge
+from app.utils.table_typing import parse_number
+
+def _sample_tables(count, rows):
+    header = ["Año", "Agrícola y Forestal", "Pecuario y Pesquero", "Total Costos Directos"]
+    return [
+        [header] + [[str(2000 + (t + i) % 25), f"${120000 + i:,}", "n/d", f"${250000 + 37 * t + i:,}"] for i in range(rows)]
+        for t in range(count)
+    ]
+
+def _naive(tables):
+    totals = {}
+    for table in tables:
+        for row in table[1:]:
+            parsed = parse_number(row[3])
+            if parsed is None:
+                continue
+            value, group = parsed[0], row[0].strip()
+            agg = totals.setdefault(group, {"count": 0, "sum": 0.0, "min": value, "max": value})
+            agg["count"] += 1
+            agg["sum"] += value
+            agg["min"] = min(agg["min"], value)
+            agg["max"] = max(agg["max"], value)
+    return totals
+
+def _vectorized(tables, batch_tables):
+    totals = {}
+    for start in range(0, len(tables), batch_tables):
+        batch = tables[start:start + batch_tables]
+        values = [row[3] for table in batch for row in table[1:]]
+        groups = [row[0].strip() for table in batch for row in table[1:]]
+        merge(totals, aggregate(parse_numbers(values), np.asarray(groups, dtype=str)))
+    return totals
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tables", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--batch-tables", type=int, default=200)
+    args = parser.parse_args()
+    tables = _sample_tables(args.tables, args.rows)
+    cells = args.tables * args.rows
+
+    naive, naive_s = _timed(lambda: _naive(tables))
+    vectorized, vectorized_s = _timed(lambda: _vectorized(tables, args.batch_tables))
+
+    assert naive.keys() == vectorized.keys()
+    for key in naive:
+        assert naive[key]["count"] == vectorized[key]["count"]
+        assert abs(naive[key]["sum"] - vectorized[key]["sum"]) < 1e-6 * abs(naive[key]["sum"])
+
+    print(f"{'modo':<14} {'segundos':>10} {'celdas/s':>12} {'speedup':>8}")
+    print(f"{'bucle Python':<14} {naive_s:>10.3f} {cells / naive_s:>12.0f} {1.0:>8.2f}")
+    print(f"{'NumPy':<14} {vectorized_s:>10.3f} {cells / vectorized_s:>12.0f} {naive_s / vectorized_s:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark del costo de autenticación por petición: get_current_user sin caché
+(jwt.decode + SELECT del usuario en cada llamada) vs con la caché de usuarios.
+
+Requiere la BD configurada en .env y al menos un usuario; solo hace lecturas.
+
+Uso:  python -m benchmarks.bench_auth [--requests 2000] [--user-id N]
+"""
+import argparse
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+from app.controllers import userControllers
+from app.utils.db_connection import close_pool
+from app.utils.db_operations import fetch_one
+
+def _timed(requests, request, before_each=None):
+    start = time.perf_counter()
+    for _ in range(requests):
+        if before_each:
+            before_each()
+        userControllers.get_current_user(request)
+    return time.perf_counter() - start
+
+def _uncached():
+    userControllers.user_cache.clear()
+    userControllers.token_cache.clear()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--user-id", type=int, default=None)
+    args = parser.parse_args()
+
+    user_id = args.user_id or fetch_one("SELECT id FROM users ORDER BY id LIMIT 1")["id"]
+    token = userControllers.create_access_token({"sub": str(user_id)}, timedelta(hours=1))
+    request = SimpleNamespace(headers={"Authorization": f"Bearer {token}"})
+
+    try:
+        # Calentamiento del pool de conexiones
+        userControllers.get_current_user(request)
+        uncached_s = _timed(args.requests, request, _uncached)
+        _uncached()
+        cached_s = _timed(args.requests, request)
+    finally:
+        close_pool()
+
+    print(f"{'modo':<10} {'segundos':>10} {'µs/petición':>12} {'speedup':>8}")
+    print(f"{'sin caché':<10} {uncached_s:>10.3f} {uncached_s / args.requests * 1e6:>12.1f} {1.0:>8.2f}")
+    print(f"{'con caché':<10} {cached_s:>10.3f} {cached_s / args.requests * 1e6:>12.1f} {uncached_s / cached_s:>8.2f}")
+    print(userControllers.user_cache.stats())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Benchmark de extracción de tablas: modo secuencial vs pool de procesos.
+
+Uso:  python -m benchmarks.bench_pdf_extraction archivo.pdf [--workers 1 2 4 8] [--repeat 3]
+"""
+import argparse
+import time
+
+from app.utils.pdf_processor import extract_tables, shutdown_executor
+
+def _best_time(file_path, workers, chunk_size, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = extract_tables(file_path, workers=workers, chunk_size=chunk_size)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("file_path")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    baseline_time, baseline = _best_time(args.file_path, 1, args.chunk_size, args.repeat)
+    print(f"{'workers':>8} {'segundos':>10} {'speedup':>8} {'idéntico':>9}")
+    print(f"{1:>8} {baseline_time:>10.3f} {1.0:>8.2f} {'sí':>9}")
+
+    for workers in args.workers:
+        if workers <= 1:
+            continue
+        # Primera pasada fuera de la medición para arrancar el pool
+        extract_tables(args.file_path, workers=workers, chunk_size=args.chunk_size)
+        elapsed, result = _best_time(args.file_path, workers, args.chunk_size, args.repeat)
+        same = "sí" if result == baseline else "NO"
+        print(f"{workers:>8} {elapsed:>10.3f} {baseline_time / elapsed:>8.2f} {same:>9}")
+        shutdown_executor()
+
+if __name__ == "__main__":
+    main()
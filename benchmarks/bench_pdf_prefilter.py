@@ -0,0 +1,39 @@
+"""
+Benchmark del pre-filtro de páginas con pdfium.
+
+Uso:  python -m benchmarks.bench_pdf_prefilter archivo.pdf [archivo2.pdf ...] [--repeat 3]
+"""
+import argparse
+import time
+
+from app.utils.pdf_processor import extract_tables, find_candidate_pages, _page_count
+
+def _best_time(func, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("file_paths", nargs="+")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'archivo':<30} {'páginas':>8} {'omitidas':>9} {'filtro s':>9} {'sin filtro s':>13} {'con filtro s':>13} {'ahorro':>7} {'idéntico':>9}")
+    for file_path in args.file_paths:
+        pages = _page_count(file_path)
+        filter_time, candidates = _best_time(lambda: find_candidate_pages(file_path), args.repeat)
+        full_time, full = _best_time(lambda: extract_tables(file_path, workers=1, prefilter=False), args.repeat)
+        filtered_time, filtered = _best_time(lambda: extract_tables(file_path, workers=1, prefilter=True), args.repeat)
+        saved = 1 - filtered_time / full_time if full_time else 0
+        same = "sí" if filtered == full else "NO"
+        print(f"{file_path[-30:]:<30} {pages:>8} {pages - len(candidates):>9} {filter_time:>9.3f} "
+              f"{full_time:>13.3f} {filtered_time:>13.3f} {saved:>7.0%} {same:>9}")
+
+if __name__ == "__main__":
+    main()
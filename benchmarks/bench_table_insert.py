@@ -0,0 +1,59 @@
+"""
+Benchmark de inserción de tablas extraídas: INSERT por fila vs INSERT multi-fila.
+
+Requiere la BD configurada en .env. Todo se ejecuta dentro de una transacción
+que se revierte al final, así que no deja datos.
+
+Uso:  python -m benchmarks.bench_table_insert [--tables 500] [--batch-sizes 50 200 500]
+"""
+import argparse
+import json
+import time
+
+from app.utils.db_connection import get_conn, close_pool
+from app.utils.db_operations import insert_extracted_tables
+
+def _sample_tables(count):
+    data = [["Año", "Agrícola", "Pecuario", "Total"]] + [[str(2000 + i), "$120,000", "$80,000", "$200,000"] for i in range(20)]
+    return [{"page": i // 3 + 1, "description": f"Tabla de prueba {i}", "data": data} for i in range(count)]
+
+def _per_row(cursor, document_id, tables):
+    for t in tables:
+        cursor.execute("""
+            INSERT INTO extracted_tables (document_id, page_number, description, table_data)
+            VALUES (%s, %s, %s, %s)
+        """, (document_id, t["page"], t["description"], json.dumps(t["data"])))
+
+def _timed(conn, insert):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO documents (filename, uploaded_by, department, upload_date)
+            VALUES ('benchmark.pdf', NULL, NULL, NOW())
+        """)
+        document_id = cursor.lastrowid
+        start = time.perf_counter()
+        insert(cursor, document_id)
+        return time.perf_counter() - start
+    finally:
+        conn.rollback()
+        cursor.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tables", type=int, default=500)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[50, 200, 500])
+    args = parser.parse_args()
+    tables = _sample_tables(args.tables)
+
+    with get_conn() as conn:
+        baseline = _timed(conn, lambda cur, doc: _per_row(cur, doc, tables))
+        print(f"{'modo':<20} {'segundos':>10} {'tablas/s':>10} {'speedup':>8}")
+        print(f"{'por fila':<20} {baseline:>10.3f} {len(tables) / baseline:>10.0f} {1.0:>8.2f}")
+        for batch_size in args.batch_sizes:
+            elapsed = _timed(conn, lambda cur, doc: insert_extracted_tables(doc, tables, cursor=cur, batch_size=batch_size))
+            print(f"{f'multi-fila x{batch_size}':<20} {elapsed:>10.3f} {len(tables) / elapsed:>10.0f} {baseline / elapsed:>8.2f}")
+    close_pool()
+
+if __name__ == "__main__":
+    main()
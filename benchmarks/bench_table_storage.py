@@ -0,0 +1,75 @@
+"""
+Benchmark del almacenamiento de table_data: JSON en TEXT (legado) vs JSON
+comprimido en LONGBLOB (table_codec).
+
+Mide tamaño guardado y latencia de lectura (decodificar hasta listas Python)
+con tablas sintéticas de distintos tamaños. Con --db además muestra cuánto
+ocupan hoy las tablas de la BD configurada en .env en cada formato.
+
+Uso:  python -m benchmarks.bench_table_storage [--rows 20 1000 50000] [--repeat 20] [--db]
+"""
+import argparse
+import json
+import time
+
+from app.utils.table_codec import encode_table, decode_table, FORMAT_JSON_TEXT
+
+TEXT_MAX_BYTES = 65535
+
+def _sample_table(rows):
+    header = ["Año", "Agrícola y Forestal", "Pecuario y Pesquero", "Comercialización", "Total Costos Directos"]
+    return [header] + [
+        [str(2000 + i % 30), f"${120000 + i:,}", f"${80000 + i:,}", f"${50000 + i:,}", f"${250000 + 3 * i:,}"]
+        for i in range(rows)
+    ]
+
+def _timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def _db_report():
+    from app.utils.db_operations import fetch_all
+    from app.utils.db_connection import close_pool
+
+    rows = fetch_all("""
+        SELECT table_format, COUNT(*) AS tables,
+               COALESCE(SUM(LENGTH(table_data)), 0) AS text_bytes,
+               COALESCE(SUM(LENGTH(table_blob)), 0) AS blob_bytes
+        FROM extracted_tables
+        GROUP BY table_format
+        ORDER BY table_format
+    """)
+    print()
+    print(f"{'formato BD':>10} {'tablas':>8} {'TEXT bytes':>12} {'BLOB bytes':>12}")
+    for row in rows:
+        print(f"{row['table_format']:>10} {row['tables']:>8} {int(row['text_bytes']):>12} {int(row['blob_bytes']):>12}")
+    close_pool()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[20, 1000, 50000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--db", action="store_true", help="Mostrar también el tamaño actual en la BD")
+    args = parser.parse_args()
+
+    print(f"{'filas':>8} {'TEXT bytes':>12} {'BLOB bytes':>12} {'ratio':>7} {'lectura TEXT ms':>16} {'lectura BLOB ms':>16} {'cabe en TEXT':>13}")
+    for rows in args.rows:
+        data = _sample_table(rows)
+        text = json.dumps(data)
+        table_format, blob = encode_table(data)
+
+        text_ms = _timed(lambda: decode_table(FORMAT_JSON_TEXT, None, text), args.repeat)
+        blob_ms = _timed(lambda: decode_table(table_format, blob), args.repeat)
+        assert decode_table(table_format, blob) == data
+
+        text_bytes = len(text.encode("utf-8"))
+        fits = "sí" if text_bytes <= TEXT_MAX_BYTES else "no"
+        print(f"{rows:>8} {text_bytes:>12} {len(blob):>12} {text_bytes / len(blob):>7.1f} {text_ms:>16.2f} {blob_ms:>16.2f} {fits:>13}")
+
+    if args.db:
+        _db_report()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import contextvars
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from app.utils import db_connection as db
+
+class _FakeConn:
+    def __init__(self, name):
+        self.name = name
+
+    def commit(self):
+        pass
+
+class _FakePool:
+    def __init__(self, name):
+        self.name = name
+        self.host, self.port, self.down_until = name, 0, 0.0
+
+    @contextmanager
+    def connection(self):
+        yield _FakeConn(self.name)
+
+@pytest.fixture(autouse=True)
+def pools(monkeypatch):
+    monkeypatch.setattr(db, "_primary", _FakePool("primary"))
+    monkeypatch.setattr(db, "_replicas", [_FakePool("replica")])
+    monkeypatch.setattr(db, "_thread_state", db.threading.local())
+
+def _read_from():
+    with db.get_conn(readonly=True) as conn:
+        return conn.name
+
+def _write(commit=True):
+    with db.get_conn() as conn:
+        if commit:
+            conn.commit()
+
+def test_lecturas_van_a_la_replica_sin_escrituras():
+    token = db.begin_request()
+    assert _read_from() == "replica"
+    assert db.end_request(token) is None
+
+def test_conexion_del_primario_sin_commit_no_cuenta_como_escritura():
+    token = db.begin_request()
+    _write(commit=False)
+    assert _read_from() == "replica"
+    assert db.end_request(token) is None
+
+def test_escritura_en_el_threadpool_se_ve_en_la_peticion():
+    token = db.begin_request()
+    # Las rutas síncronas corren con una copia del contexto
+    contextvars.copy_context().run(_write)
+    assert _read_from() == "primary"
+    assert db.end_request(token) is not None
+
+def test_cookie_de_otra_peticion_fuerza_el_primario():
+    token = db.begin_request(time.time() - 0.5)
+    assert _read_from() == "primary"
+    db.end_request(token)
+
+    token = db.begin_request(time.time() - db.READ_YOUR_WRITES_SECONDS - 1)
+    assert _read_from() == "replica"
+    db.end_request(token)
+
+def test_cookie_con_fecha_futura_no_extiende_la_ventana():
+    token = db.begin_request(time.time() + 3600)
+    assert db._state().last_write <= time.time()
+    db.end_request(token)
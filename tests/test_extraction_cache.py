@@ -0,0 +1,29 @@
+from app.utils import extraction_cache
+
+def test_contadores_compartidos_en_la_bd(monkeypatch):
+    counters = {}
+
+    def execute(query, params=()):
+        if "extraction_cache_counters" in query:
+            name, amount = params
+            counters[name] = counters.get(name, 0) + amount
+
+    def fetch_all(query, params=()):
+        return [{"name": name, "value": value} for name, value in counters.items()]
+
+    monkeypatch.setattr(extraction_cache, "execute", execute)
+    monkeypatch.setattr(extraction_cache, "fetch_all", fetch_all)
+    monkeypatch.setattr(extraction_cache, "fetch_one", lambda query, params=(): (
+        {"entries": 2, "size_bytes": 10, "total_hits": 3} if "COUNT(*)" in query else None
+    ))
+    monkeypatch.setattr(extraction_cache, "extractor_version", lambda: "v1")
+
+    # Lo que registra el worker lo lee la API desde la BD
+    assert extraction_cache.get_cached_tables("abc") is None
+    extraction_cache._count("hits", 3)
+
+    stats = extraction_cache.cache_stats()
+    assert stats["hits"] == 3 and stats["misses"] == 1
+    assert stats["hit_rate"] == 0.75
+    assert stats["stores"] == 0 and stats["evictions"] == 0
+    assert stats["entries"] == 2
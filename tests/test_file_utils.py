@@ -0,0 +1,52 @@
+import io
+import os
+import time
+
+import pytest
+
+from app.utils import file_utils
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_utils, "UPLOAD_FOLDER", str(tmp_path))
+    monkeypatch.setattr(file_utils, "TMP_FOLDER", str(tmp_path / "tmp"))
+    os.makedirs(tmp_path / "tmp")
+    return tmp_path
+
+def _age(path, seconds):
+    old = time.time() - seconds
+    os.utime(path, (old, old))
+
+def test_save_stream_deduplica_y_renueva_el_blob(store):
+    key, path = file_utils.save_stream(io.BytesIO(b"%PDF-1.4 contenido"))
+    _age(path, 2 * file_utils.BLOB_SWEEP_GRACE_SECONDS)
+    again, same_path = file_utils.save_stream(io.BytesIO(b"%PDF-1.4 contenido"))
+    assert (again, same_path) == (key, path)
+    assert os.path.getmtime(path) > time.time() - 60
+    assert os.listdir(store / "tmp") == []
+
+def test_sweep_borra_solo_blobs_viejos_sin_documentos(store):
+    _, used = file_utils.save_stream(io.BytesIO(b"usado"))
+    orphan_key, orphan = file_utils.save_stream(io.BytesIO(b"huerfano"))
+    _, recent = file_utils.save_stream(io.BytesIO(b"recien subido"))
+    for path in (used, orphan):
+        _age(path, 2 * file_utils.BLOB_SWEEP_GRACE_SECONDS)
+    used_key = os.path.basename(used)[:-4]
+
+    removed = file_utils.sweep_blobs(lambda keys: {k for k in keys if k == used_key})
+
+    assert removed == 1
+    assert not os.path.exists(orphan)
+    assert os.path.exists(used) and os.path.exists(recent)
+
+def test_sweep_respeta_una_subida_concurrente(store, monkeypatch):
+    # La subida del mismo contenido llega entre la consulta a la BD y el borrado
+    key, path = file_utils.save_stream(io.BytesIO(b"compartido"))
+    _age(path, 2 * file_utils.BLOB_SWEEP_GRACE_SECONDS)
+
+    def referenced(keys):
+        file_utils.save_stream(io.BytesIO(b"compartido"))
+        return set()
+
+    assert file_utils.sweep_blobs(referenced) == 0
+    assert os.path.exists(path)
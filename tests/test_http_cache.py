@@ -0,0 +1,61 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from app.controllers.userControllers import get_current_user
+from app.routes import document_route
+from app.utils.http_cache import make_etag, etag_matches, cache_headers, not_modified, CACHE_CONTROL
+
+def _request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+def test_make_etag_es_fuerte_y_depende_de_las_partes():
+    etag = make_etag("document", 1, "a.pdf")
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == make_etag("document", 1, "a.pdf")
+    assert etag != make_etag("document", 1, "b.pdf")
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ('"otro"', False),
+    ('"abc"', True),
+    ('"x", W/"abc"', True),
+    ("*", True),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(_request(header), '"abc"') is expected
+
+def test_not_modified():
+    response = not_modified('"abc"')
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == '"abc"'
+    assert response.headers["cache-control"] == CACHE_CONTROL
+    assert cache_headers('"abc"') == {"ETag": '"abc"', "Cache-Control": CACHE_CONTROL}
+
+@pytest.fixture
+def client(monkeypatch):
+    document = {"id": 7, "filename": "a.pdf", "department": 1, "upload_date": "2024-01-01 00:00:00"}
+    monkeypatch.setattr(document_route, "fetch_one", lambda query, params=(): dict(document))
+    app = FastAPI()
+    app.include_router(document_route.router, prefix="/api/documents")
+    app.dependency_overrides[get_current_user] = lambda: {"id": 1, "rol": "admin", "department_id": None}
+    return TestClient(app), document
+
+def test_documento_responde_304_con_el_etag_vigente(client):
+    client, document = client
+    first = client.get("/api/documents/7")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    second = client.get("/api/documents/7", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == etag
+
+    document["filename"] = "b.pdf"
+    third = client.get("/api/documents/7", headers={"If-None-Match": etag})
+    assert third.status_code == 200
+    assert third.headers["etag"] != etag
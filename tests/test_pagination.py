@@ -0,0 +1,50 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from app.utils.pagination import encode_cursor, decode_cursor, split_page
+
+def _raw_cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+def test_cursor_ida_y_vuelta():
+    when = datetime(2024, 5, 17, 10, 30, 5)
+    cursor = encode_cursor(when, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, 2, datetimes=(0,)) == [when, 42]
+
+def test_cursor_con_textos_y_numeros():
+    cursor = encode_cursor("Ñandú García", 7, 3.5)
+    assert decode_cursor(cursor, 3) == ["Ñandú García", 7, 3.5]
+
+@pytest.mark.parametrize("cursor", [
+    "no es base64!",
+    base64.urlsafe_b64encode(b"no es json").decode(),
+    _raw_cursor({"a": 1}),
+    _raw_cursor([1]),
+    _raw_cursor([1, 2, 3]),
+    _raw_cursor([[1], 2]),
+    _raw_cursor([True, 2]),
+    _raw_cursor([None, 2]),
+])
+def test_cursores_invalidos(cursor):
+    with pytest.raises(ValueError, match="Cursor inválido"):
+        decode_cursor(cursor, 2)
+
+@pytest.mark.parametrize("payload", [[5, 1], ["ayer", 1]])
+def test_cursor_con_fecha_invalida(payload):
+    with pytest.raises(ValueError, match="Cursor inválido"):
+        decode_cursor(_raw_cursor(payload), 2, datetimes=(0,))
+
+def test_split_page_sin_pagina_siguiente():
+    rows = [{"id": 3}, {"id": 2}]
+    assert split_page(rows, 2, lambda r: (r["id"],)) == (rows, None)
+    assert split_page([], 2, lambda r: (r["id"],)) == ([], None)
+
+def test_split_page_con_fila_extra():
+    rows = [{"name": "Ana", "id": 9}, {"name": "Beto", "id": 4}, {"name": "Carla", "id": 1}]
+    page, cursor = split_page(rows, 2, lambda r: (r["name"], r["id"]))
+    assert page == rows[:2]
+    assert decode_cursor(cursor, 2) == ["Beto", 4]
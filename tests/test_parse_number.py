@@ -0,0 +1,41 @@
+import math
+
+import pytest
+
+from app.utils.table_aggregate import parse_numbers
+from app.utils.table_typing import parse_number, KIND_NUMBER, KIND_CURRENCY, KIND_PERCENT
+
+@pytest.mark.parametrize("cell, expected", [
+    ("2020", (2020.0, KIND_NUMBER)),
+    ("400.000", (400000.0, KIND_NUMBER)),
+    ("1,234.5", (1234.5, KIND_NUMBER)),
+    ("1.234,5", (1234.5, KIND_NUMBER)),
+    ("0,75", (0.75, KIND_NUMBER)),
+    ("3.", (3.0, KIND_NUMBER)),
+    (".5", (0.5, KIND_NUMBER)),
+    ("(5)", (-5.0, KIND_NUMBER)),
+    ("-$3", (-3.0, KIND_CURRENCY)),
+    ("USD 1.000", (1000.0, KIND_CURRENCY)),
+    ("50%", (50.0, KIND_PERCENT)),
+    ("95 mg/dL", (95.0, KIND_NUMBER)),
+    ("12 años", (12.0, KIND_NUMBER)),
+])
+def test_parse_number(cell, expected):
+    assert parse_number(cell) == expected
+
+@pytest.mark.parametrize("cell", [None, "", "abc", "1e5", "5 m3"])
+def test_parse_number_no_numerico(cell):
+    assert parse_number(cell) is None
+
+def test_parse_numbers_coincide_con_parse_number():
+    cells = [
+        "1e5", "3.", "3,", ".5", ",500", "-.5", "1 234", "1.234.567", "400.000",
+        "0,75", "1.234,5", "(1,234.5)", "€ 12,50", "USD 1.000", "-$3", "50%",
+        "12 mg", "12 años", "95 mg/dL", "5 m3", "3.5e", "abc", "", "2020",
+    ]
+    for cell, value in zip(cells, parse_numbers(cells)):
+        parsed = parse_number(cell)
+        if parsed is None:
+            assert math.isnan(value), cell
+        else:
+            assert value == parsed[0], cell
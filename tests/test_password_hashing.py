@@ -0,0 +1,24 @@
+import asyncio
+
+import pytest
+
+from app.controllers import userControllers
+from app.utils import password_hashing
+
+@pytest.fixture(scope="module", autouse=True)
+def executor():
+    yield
+    password_hashing.shutdown_executor()
+
+def test_pool_de_procesos_con_spawn():
+    assert password_hashing._get_executor()._mp_context.get_start_method() == "spawn"
+
+def test_authenticate_user_async(monkeypatch):
+    hashed = password_hashing.hash_password("secreta")
+    assert password_hashing.verify_password("secreta", hashed) == (True, None)
+
+    monkeypatch.setattr(userControllers, "get_user_by_email",
+                        lambda email: {"id": 1, "email": email, "password": hashed} if email == "a@b.com" else None)
+    assert asyncio.run(userControllers.authenticate_user("a@b.com", "secreta"))["id"] == 1
+    assert asyncio.run(userControllers.authenticate_user("a@b.com", "otra")) is False
+    assert asyncio.run(userControllers.authenticate_user("x@b.com", "secreta")) is False
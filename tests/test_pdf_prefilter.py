@@ -0,0 +1,57 @@
+from app.utils.pdf_processor import find_candidate_pages
+
+LINE = b"0 0 m 100 100 l S"
+
+def _build_pdf(depth: int, line: bytes = LINE) -> bytes:
+    """PDF de una página cuyo único trazo está dentro de `depth` Form XObjects anidados."""
+    first_form = 4
+    objects = [
+        ("<< /Type /Catalog /Pages 2 0 R >>", None),
+        ("<< /Type /Pages /Kids [3 0 R] /Count 1 >>", None),
+    ]
+    resources = f"<< /XObject << /Fx {first_form} 0 R >> >>" if depth else "<< >>"
+    objects.append((
+        f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 200 200] /Resources {resources} "
+        f"/Contents {first_form + depth} 0 R >>", None,
+    ))
+    for level in range(depth):
+        last = level == depth - 1
+        content = line if last else b"/Fx Do"
+        res = "<< >>" if last else f"<< /XObject << /Fx {first_form + level + 1} 0 R >> >>"
+        objects.append((
+            f"<< /Type /XObject /Subtype /Form /BBox [0 0 200 200] /Resources {res} /Length {len(content)} >>",
+            content,
+        ))
+    page_content = b"/Fx Do" if depth else line
+    objects.append((f"<< /Length {len(page_content)} >>", page_content))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, (body, stream) in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}".encode()
+        if stream is not None:
+            out += b"\nstream\n" + stream + b"\nendstream"
+        out += b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+def _pdf(tmp_path, depth, line=LINE):
+    path = tmp_path / f"depth{depth}.pdf"
+    path.write_bytes(_build_pdf(depth, line))
+    return str(path)
+
+def test_trazo_en_la_pagina(tmp_path):
+    assert find_candidate_pages(_pdf(tmp_path, 0)) == [1]
+
+def test_trazo_en_forms_anidados(tmp_path):
+    for depth in (1, 3, 6):
+        assert find_candidate_pages(_pdf(tmp_path, depth)) == [1]
+
+def test_pagina_sin_trazos(tmp_path):
+    text = b"BT /F1 12 Tf 10 10 Td (Texto) Tj ET"
+    assert find_candidate_pages(_pdf(tmp_path, 0, text)) == []
+    assert find_candidate_pages(_pdf(tmp_path, 2, text)) == []
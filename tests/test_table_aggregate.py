@@ -0,0 +1,81 @@
+import pytest
+
+from app.utils import table_aggregate, table_rows
+from app.utils.table_codec import encode_chunks, encode_table, FORMAT_CHUNKED
+
+SMALL = [["Año", "Región", "Total"], ["2020", "Norte", "1.000"], ["2021", "Sur", "(50)"], ["2020", "Sur", "n/a"]]
+BIG = [["Año", "Total"]] + [[str(2020 + i % 2), str(i)] for i in range(1, 11)]
+
+@pytest.fixture
+def db(monkeypatch):
+    fmt, blob = encode_table(SMALL)
+    tables = {
+        1: {"id": 1, "table_format": fmt, "table_blob": blob, "table_data": None, "row_count": len(SMALL), "chunk_rows": None},
+        2: {"id": 2, "table_format": FORMAT_CHUNKED, "table_blob": None, "table_data": None, "row_count": len(BIG), "chunk_rows": 4},
+    }
+    chunks = [{"chunk_blob": blob} for blob in encode_chunks(BIG, 4)]
+    batches = []
+
+    def fetch_all(query, params=()):
+        if "FROM table_numeric_values" in query:
+            return [{"table_id": 2, "column_index": 1, "row_count": len(BIG)},
+                    {"table_id": 1, "column_index": 2, "row_count": len(SMALL)}]
+        if "FROM extracted_tables" in query:
+            batches.append(list(params))
+            return [tables[table_id] for table_id in params]
+        if "FROM extracted_table_chunks" in query:
+            return chunks
+        raise AssertionError(query)
+
+    monkeypatch.setattr(table_aggregate, "fetch_all", fetch_all)
+    monkeypatch.setattr(table_rows, "fetch_all", fetch_all)
+    return batches
+
+def test_batches_acotados_por_filas():
+    tables = [{"table_id": i, "row_count": n} for i, n in enumerate([40, 40, 30, 500, 10])]
+    batches = [[t["table_id"] for t in b] for b in table_aggregate._batches(tables, 10, 100)]
+    assert batches == [[0, 1], [2], [3], [4]]
+    batches = [[t["table_id"] for t in b] for b in table_aggregate._batches(tables, 2, 1000)]
+    assert batches == [[0, 1], [2, 3], [4]]
+
+def test_aggregate_column_por_grupo(db):
+    groups, tables = table_aggregate.aggregate_column("Total", group_by="año", batch_rows=12)
+    assert tables == 2
+    assert db == [[1], [2]]
+    assert groups["2020"] == {"count": 6, "sum": 1030.0, "min": 2.0, "max": 1000.0, "avg": 1030.0 / 6}
+    assert groups["2021"] == {"count": 6, "sum": -25.0, "min": -50.0, "max": 9.0, "avg": -25.0 / 6}
+
+def test_aggregate_column_sin_grupo(db):
+    groups, _ = table_aggregate.aggregate_column("Total")
+    assert db == [[1, 2]]
+    assert groups["total"]["count"] == 12
+    assert groups["total"]["sum"] == 1005.0
+
+def test_tablas_sin_la_columna_de_grupo_se_omiten(db):
+    groups, _ = table_aggregate.aggregate_column("Total", group_by="Región")
+    assert groups == {
+        "Norte": {"count": 1, "sum": 1000.0, "min": 1000.0, "max": 1000.0, "avg": 1000.0},
+        "Sur": {"count": 1, "sum": -50.0, "min": -50.0, "max": -50.0, "avg": -50.0},
+    }
+
+def test_celdas_largas_no_ensanchan_los_arreglos(monkeypatch):
+    cells = ["12", "x" * 500, "1" * 100]
+    assert table_aggregate.parse_numbers(cells)[0] == 12.0
+    assert all(v != v for v in table_aggregate.parse_numbers(cells)[1:])
+
+    widths = []
+    real_aggregate = table_aggregate.aggregate
+    def aggregate(values, groups):
+        widths.append(groups.dtype.itemsize // 4)
+        return real_aggregate(values, groups)
+    monkeypatch.setattr(table_aggregate, "aggregate", aggregate)
+
+    long_group = [["Grupo", "Total"], ["g" * 500, "5"], ["corto", "7"]]
+    fmt, blob = encode_table(long_group)
+    table = {"id": 1, "table_format": fmt, "table_blob": blob, "table_data": None, "chunk_rows": None}
+    monkeypatch.setattr(table_aggregate, "fetch_all", lambda query, params=(): (
+        [{"table_id": 1, "column_index": 1, "row_count": 3}] if "table_numeric_values" in query else [table]
+    ))
+    groups, _ = table_aggregate.aggregate_column("Total", group_by="Grupo")
+    assert widths == [table_aggregate.GROUP_MAX_CHARS]
+    assert groups["g" * table_aggregate.GROUP_MAX_CHARS]["sum"] == 5.0
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from app.utils import table_codec, table_rows
+from app.utils.table_codec import (
+    FORMAT_JSON_TEXT, FORMAT_ZLIB_JSON, FORMAT_CHUNKED,
+    encode_table, encode_chunks, decode_table, decode_chunk, chunk_items_json,
+    table_json, iter_table_json,
+)
+
+DATA = [["Año", "Costo (US$)", "Variación"]] + [[str(2000 + i), f"${1000 * i:,}", f"{i}%"] for i in range(25)] + [["Ñandú", "", None]]
+
+def test_formato_0_texto_legado():
+    text = json.dumps(DATA)
+    assert decode_table(FORMAT_JSON_TEXT, None, text) == DATA
+    assert decode_table(FORMAT_JSON_TEXT, None, None) == []
+    assert b"".join(iter_table_json(FORMAT_JSON_TEXT, None, text)) == text.encode("utf-8")
+
+def test_formato_1_zlib():
+    table_format, blob = encode_table(DATA)
+    assert table_format == FORMAT_ZLIB_JSON
+    assert decode_table(table_format, blob) == DATA
+    assert json.loads(table_json(table_format, blob)) == DATA
+
+def test_formato_1_en_trozos():
+    _, blob = encode_table(DATA * 50)
+    pieces = list(iter_table_json(FORMAT_ZLIB_JSON, blob, chunk_size=256))
+    assert len(pieces) > 1 and all(len(p) <= 256 for p in pieces)
+    assert json.loads(b"".join(pieces)) == DATA * 50
+
+def test_formato_2_bloques():
+    chunks = encode_chunks(DATA, chunk_rows=10)
+    assert len(chunks) == 3
+    assert [row for blob in chunks for row in decode_chunk(blob)] == DATA
+    # Los bloques se concatenan sin decodificar, como hace el streaming
+    spliced = b"[" + b",".join(chunk_items_json(blob) for blob in chunks) + b"]"
+    assert json.loads(spliced) == DATA
+
+def test_formato_2_no_se_lee_como_blob():
+    with pytest.raises(ValueError):
+        table_json(FORMAT_CHUNKED, None)
+    with pytest.raises(ValueError):
+        table_json(99, b"")
+
+@pytest.mark.parametrize("offset, limit", [(0, 5), (8, 5), (9, 12), (20, 100), (30, 5)])
+def test_read_rows_en_bloques(monkeypatch, offset, limit):
+    chunks = encode_chunks(DATA, chunk_rows=10)
+
+    def fetch_all(query, params):
+        _, first, last = params
+        return [{"chunk_index": i, "chunk_blob": chunks[i]} for i in range(first, min(last, len(chunks) - 1) + 1)]
+
+    monkeypatch.setattr(table_rows, "fetch_all", fetch_all)
+    table = {"id": 1, "table_format": FORMAT_CHUNKED, "table_blob": None, "table_data": None, "chunk_rows": 10}
+    assert table_rows.read_rows(table, offset, limit) == DATA[offset:offset + limit]
+
+def test_read_rows_sin_bloques():
+    table_format, blob = encode_table(DATA)
+    table = {"table_format": table_format, "table_blob": blob, "table_data": None, "chunk_rows": None}
+    assert table_rows.read_rows(table, 3, 4) == DATA[3:7]
+    assert table_codec.CURRENT_FORMAT == FORMAT_ZLIB_JSON
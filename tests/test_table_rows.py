@@ -0,0 +1,22 @@
+import pytest
+
+from app.utils.table_rows import column_indexes, project
+
+HEADER = ["Departamento", "2019", "2020", None, "Total"]
+
+def test_columnas_por_nombre():
+    assert column_indexes(HEADER, ["Total", "Departamento"]) == [4, 0]
+
+def test_encabezado_numerico_se_toma_como_nombre():
+    assert column_indexes(HEADER, ["2020", "2019"]) == [2, 1]
+
+def test_posicion_si_no_coincide_con_un_nombre():
+    assert column_indexes(HEADER, ["0", "3"]) == [0, 3]
+
+def test_columna_inexistente():
+    with pytest.raises(ValueError, match="Columna no encontrada: Otra"):
+        column_indexes(HEADER, ["Otra"])
+
+def test_project_rellena_filas_cortas():
+    rows = [HEADER, ["Antioquia", "1", "2"]]
+    assert project(rows, column_indexes(HEADER, ["Departamento", "Total"])) == [["Departamento", "Total"], ["Antioquia", None]]
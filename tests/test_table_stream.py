@@ -0,0 +1,129 @@
+import json
+from contextlib import contextmanager
+
+import anyio
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app.utils import table_stream
+from app.utils.db_connection import PoolExhaustedError
+from app.utils.table_codec import encode_table, encode_chunks, FORMAT_CHUNKED
+
+SMALL = [["A", "B"], ["1", "2"]]
+BIG = [["X"]] + [[str(i)] for i in range(5)]
+
+def _rows():
+    fmt, blob = encode_table(SMALL)
+    rows = [{"id": 1, "description": "a", "table_format": fmt, "table_blob": blob, "table_data": None, "chunk_blob": None}]
+    for chunk in encode_chunks(BIG, 2):
+        rows.append({"id": 2, "description": "b", "table_format": FORMAT_CHUNKED, "table_blob": None,
+                     "table_data": None, "chunk_blob": chunk})
+    return rows
+
+class _FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.closed = False
+
+    def execute(self, query, params):
+        if self.conn.fail:
+            raise RuntimeError("consulta inválida")
+
+    def __iter__(self):
+        return iter(_rows())
+
+    def close(self):
+        self.closed = True
+
+class _FakeConn:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.cursors = []
+        self.disconnected = False
+        self.released = False
+
+    def cursor(self, dictionary=False):
+        self.cursors.append(_FakeCursor(self))
+        return self.cursors[-1]
+
+    def disconnect(self):
+        self.disconnected = True
+
+@pytest.fixture
+def conn(monkeypatch):
+    conn = _FakeConn()
+
+    @contextmanager
+    def get_conn(readonly=False):
+        try:
+            yield conn
+        finally:
+            conn.released = True
+
+    monkeypatch.setattr(table_stream, "get_conn", get_conn)
+    return conn
+
+def _client(monkeypatch, error):
+    def get_conn(readonly=False):
+        raise error
+    monkeypatch.setattr(table_stream, "get_conn", get_conn)
+
+    app = FastAPI()
+
+    @app.exception_handler(PoolExhaustedError)
+    async def pool_exhausted(request, exc):
+        return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+    @app.get("/tables")
+    def tables():
+        return table_stream.stream_tables("SELECT ...", (), {}, "tables")
+
+    return TestClient(app, raise_server_exceptions=False)
+
+def test_pool_agotado_responde_503(monkeypatch):
+    response = _client(monkeypatch, PoolExhaustedError("sin conexiones")).get("/tables")
+    assert response.status_code == 503
+
+def test_error_de_consulta_antes_de_enviar_cabeceras(conn):
+    conn.fail = True
+    with pytest.raises(RuntimeError):
+        table_stream.stream_tables("SELECT ...", (), {}, "tables")
+    assert conn.released and conn.cursors[0].closed
+
+def test_respuesta_completa(conn):
+    response = table_stream.stream_tables("SELECT ...", (), {"document_id": 7}, "tables")
+    body = b"".join(response._content)
+    assert json.loads(body) == {"document_id": 7, "tables": [
+        {"id": 1, "description": "a", "table_data": SMALL},
+        {"id": 2, "description": "b", "table_data": BIG},
+    ]}
+    assert conn.released and conn.cursors[0].closed
+    assert not conn.disconnected
+
+def test_descarga_cortada_descarta_la_conexion(monkeypatch, conn):
+    monkeypatch.setattr(table_stream, "STREAM_CHUNK_BYTES", 1)
+    response = table_stream.stream_tables("SELECT ...", (), {}, "tables")
+    next(response._content)
+    response._content.close()
+    assert conn.disconnected and conn.released
+
+def test_lector_lento_se_corta(conn):
+    response = table_stream.stream_tables("SELECT ...", (), {}, "tables")
+    response._max_seconds = 0.05
+
+    async def slow_send(message):
+        await anyio.sleep(1)
+
+    async def run():
+        with pytest.raises(TimeoutError):
+            await response.stream_response(slow_send)
+
+    anyio.run(run)
+    assert conn.disconnected and conn.released
+
+def test_contenido_cerrado_sin_empezar_libera_la_conexion(conn):
+    response = table_stream.stream_tables("SELECT ...", (), {}, "tables")
+    response._content.close()
+    assert conn.disconnected and conn.released
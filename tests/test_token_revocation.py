@@ -0,0 +1,47 @@
+import time
+from datetime import timedelta
+
+import pytest
+from jose import jwt
+
+from app.controllers import userControllers
+from app.utils import token_revocation
+from app.utils.token_revocation import RevocationStore, token_key
+
+@pytest.fixture
+def store(monkeypatch):
+    inserted = []
+    monkeypatch.setattr(token_revocation, "execute", lambda query, params=(): inserted.append(params))
+    store = RevocationStore()
+    monkeypatch.setattr(store, "_maybe_sync", lambda: None)
+    monkeypatch.setattr(userControllers, "revocation_store", store)
+    return store, inserted
+
+def test_revoca_un_token_valido(store):
+    store, inserted = store
+    token = userControllers.create_access_token({"sub": "1"})
+    userControllers.revoke_token(token)
+    assert store.is_revoked(token)
+    assert inserted[0][0] == token_key(token)
+
+def test_ignora_tokens_con_firma_invalida(store):
+    store, inserted = store
+    forged = jwt.encode({"sub": "1", "exp": 2 ** 40}, "otra-clave", algorithm=userControllers.ALGORITHM)
+    userControllers.revoke_token(forged)
+    userControllers.revoke_token("no-es-un-jwt")
+    assert inserted == []
+    assert not store.is_revoked(forged)
+
+def test_ignora_tokens_vencidos(store):
+    store, inserted = store
+    token = userControllers.create_access_token({"sub": "1"}, expires_delta=timedelta(seconds=-10))
+    userControllers.revoke_token(token)
+    assert inserted == []
+
+def test_acota_el_exp_guardado(store):
+    store, inserted = store
+    token = jwt.encode({"sub": "1", "exp": 2 ** 40}, userControllers.SECRET_KEY, algorithm=userControllers.ALGORITHM)
+    userControllers.revoke_token(token)
+    expires_at = inserted[0][1]
+    assert expires_at <= time.time() + userControllers.MAX_TOKEN_LIFETIME_SECONDS
+    assert store.is_revoked(token)